@@ -1,10 +1,15 @@
 import openai
+import argparse
 import csv
 import os
+import sys
 import time
 from datetime import datetime
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "Scrap"))
+from article_store import DEFAULT_STORE_PATH, ArticleStore
+
 load_dotenv()
 # client = OpenAI()
 
@@ -92,7 +97,38 @@ def main(input_csv, output_csv):
     
     print(f"Categorization completed. Results saved to {output_csv}")
 
+def categorize_store(store_path=DEFAULT_STORE_PATH, batch_size=20):
+    """
+    Categorize only the articles of the article store that are new, or whose content
+    changed since they were categorized. Results are saved batch_size at a time.
+    """
+    store = ArticleStore(store_path)
+    done = 0
+    while True:
+        batch = store.pending_categorization(limit=batch_size)
+        if not batch:
+            break
+        results = []
+        for article in batch:
+            combined_text = "\n".join([article["title"] or "", article["summary"] or "", article["content"] or ""])
+            done += 1
+            print(f"Categorizing article {done}...")
+            results.append((article["url"], categorize_article(combined_text), article["content_hash"]))
+            # Pause to help avoid rate limits; adjust the delay as needed.
+            time.sleep(1)
+        store.set_categories(results)
+    store.close()
+    print(f"Categorization completed. {done} articles categorized in {store_path}")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Categorize articles with GPT')
+    parser.add_argument('--store', nargs='?', const=DEFAULT_STORE_PATH,
+                        help='Categorize new or changed articles of the SQLite article store')
+    args = parser.parse_args()
+    if args.store:
+        categorize_store(args.store)
+        sys.exit()
+
     # timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     # output_csv_file = f"categorized_articles_{timestamp}.csv"
     # input_csv_file = r"D:\Data\vietnews\output\motgame_20250404_174106 - Copy.csv"  # Change to your input file path
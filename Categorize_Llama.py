@@ -1,5 +1,7 @@
+import argparse
 import csv
 import os
+import sys
 import time
 from datetime import datetime
 from dotenv import load_dotenv
@@ -8,6 +10,9 @@ from llama_index.core import Settings
 from llama_index.llms.gemini import Gemini
 from llama_index.core.llms import ChatMessage
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "Scrap"))
+from article_store import DEFAULT_STORE_PATH, ArticleStore
+
 load_dotenv()
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
@@ -104,7 +109,37 @@ def main(input_csv, output_csv):
 
     print(f"\n✅ Categorization completed. Results saved to {output_csv}")
 
+def categorize_store(store_path=DEFAULT_STORE_PATH):
+    """
+    Categorize only the articles of the article store that are new, or whose content
+    changed since they were categorized, 15 per request as in main()
+    """
+    store = ArticleStore(store_path)
+    done = 0
+    while True:
+        batch = store.pending_categorization(limit=15)
+        if not batch:
+            break
+        print(f"\n🔄 Processing {len(batch)} articles ({done} done this run)...")
+        combined_texts = ["\n".join([a["title"] or "", a["summary"] or "", a["content"] or ""]) for a in batch]
+        batch_results = categorize_articles_batch(combined_texts)
+        # One transaction per batch; an interrupted run resumes with the rest
+        store.set_categories([(a["url"], batch_results.get(i, "None"), a["content_hash"])
+                              for i, a in enumerate(batch)])
+        done += len(batch)
+        time.sleep(1)
+    store.close()
+    print(f"\n✅ Categorization completed. {done} articles categorized in {store_path}")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Categorize articles with Gemini')
+    parser.add_argument('--store', nargs='?', const=DEFAULT_STORE_PATH,
+                        help='Categorize new or changed articles of the SQLite article store')
+    args = parser.parse_args()
+    if args.store:
+        categorize_store(args.store)
+        sys.exit()
+
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_csv_file = f"categorized_articles_tinhte_{timestamp}.csv"
     input_csv_file = r"D:\Data\vietnews\src\cleaned_dataset\merged_data_2.csv"
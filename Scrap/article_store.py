@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from http_cache import normalize_url
+
+# One store for the whole pipeline, next to the root scripts that read it
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "articles.sqlite")
+
+# Article fields as written by the scrapers (CSV column -> store column)
+ROW_COLUMNS = {"Date": "date", "Title": "title", "Summary": "summary", "Content": "content"}
+
+
+def content_hash(content):
+    return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+
+def split_keywords(value):
+    """Keywords of a row: a list, or the "a; b" string the CSVs carry"""
+    if isinstance(value, list):
+        return [k for k in value if k]
+    return [k.strip() for k in str(value or "").split(";") if k.strip()]
+
+
+class ArticleStore:
+    """
+    SQLite store of every crawled article, keyed by canonical URL, shared by the
+    scrapers and the pipeline scripts. Writes are upserts: a URL crawled again (by
+    another keyword, site run or month) updates its row instead of adding one, so
+    duplicates never get in. Each later stage works off its own marker column and
+    only touches rows that are new or changed since it last ran:
+      categorized_hash  content hash the categories were computed from
+      category_source   raw categories the cleaned `category` was derived from
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        # Scrapers and pipeline scripts may run side by side, so wait on locks rather than fail
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            " url TEXT PRIMARY KEY, link TEXT, site TEXT, keywords TEXT,"
+            " date TEXT, title TEXT, summary TEXT, content TEXT, content_hash TEXT,"
+            " categories TEXT, categorized_hash TEXT, category TEXT, category_source TEXT,"
+            " first_seen TEXT, last_crawled TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS articles_site ON articles (site)")
+        self._conn.commit()
+
+    def upsert_many(self, rows, site=None):
+        """
+        Insert or update scraper rows (Date/Title/Summary/Content/Link/Keywords, plus
+        an optional Site) in one transaction. Keywords are merged with the stored
+        ones, and an empty field (e.g. a failed article fetch) never overwrites a
+        stored value. Returns (inserted, updated, unchanged) counts.
+        """
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        merged = {}
+        for row in rows:
+            link = (row.get("Link") or "").strip()
+            if not link:
+                continue
+            url = normalize_url(link)
+            values = {column: row.get(field) or "" for field, column in ROW_COLUMNS.items()}
+            values["link"] = link
+            values["site"] = row.get("Site") or site or ""
+            values["keywords"] = split_keywords(row.get("Keywords"))
+            if url in merged:
+                # The same article twice in one batch: combine before touching the table
+                values = self._merge(merged[url], values)
+            merged[url] = values
+
+        inserted = updated = unchanged = 0
+        with self._lock, self._conn:
+            existing = {}
+            urls = list(merged)
+            for start in range(0, len(urls), 500):
+                chunk = urls[start:start + 500]
+                for stored in self._conn.execute(
+                        f"SELECT * FROM articles WHERE url IN ({', '.join('?' * len(chunk))})", chunk):
+                    existing[stored["url"]] = stored
+            for url, values in merged.items():
+                stored = existing.get(url)
+                if stored is None:
+                    self._conn.execute(
+                        "INSERT INTO articles (url, link, site, keywords, date, title, summary, content,"
+                        " content_hash, first_seen, last_crawled) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (url, values["link"], values["site"], json.dumps(values["keywords"], ensure_ascii=False),
+                         values["date"], values["title"], values["summary"], values["content"],
+                         content_hash(values["content"]), now, now)
+                    )
+                    inserted += 1
+                    continue
+                old = {column: stored[column] for column in ("link", "site", *ROW_COLUMNS.values())}
+                old["keywords"] = json.loads(stored["keywords"] or "[]")
+                new = self._merge(old, values)
+                if new == old:
+                    unchanged += 1
+                    self._conn.execute("UPDATE articles SET last_crawled = ? WHERE url = ?", (now, url))
+                    continue
+                self._conn.execute(
+                    "UPDATE articles SET link = ?, site = ?, keywords = ?, date = ?, title = ?, summary = ?,"
+                    " content = ?, content_hash = ?, last_crawled = ? WHERE url = ?",
+                    (new["link"], new["site"], json.dumps(new["keywords"], ensure_ascii=False), new["date"],
+                     new["title"], new["summary"], new["content"], content_hash(new["content"]), now, url)
+                )
+                updated += 1
+        return inserted, updated, unchanged
+
+    @staticmethod
+    def _merge(old, new):
+        """Stored values overlaid with the non-empty new ones, keywords unioned in order"""
+        merged = dict(old)
+        for column, value in new.items():
+            if column == "keywords":
+                merged["keywords"] = old.get("keywords", []) + [k for k in value if k not in old.get("keywords", [])]
+            elif value:
+                merged[column] = value
+        return merged
+
+    def pending_categorization(self, limit=None):
+        """Rows with content never categorized, or changed since they were"""
+        query = ("SELECT url, link, site, title, summary, content, content_hash FROM articles"
+                 " WHERE content != '' AND categorized_hash IS NOT content_hash ORDER BY first_seen")
+        return self._select(query, limit)
+
+    def set_categories(self, results):
+        """Save (url, categories, content_hash) results of the categorization stage"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE articles SET categories = ?, categorized_hash = ? WHERE url = ?",
+                [(categories, hash_, url) for url, categories, hash_ in results]
+            )
+
+    def pending_cleanup(self, limit=None):
+        """Categorized rows whose cleaned category hasn't been derived from their current categories"""
+        query = ("SELECT url, categories FROM articles"
+                 " WHERE categories IS NOT NULL AND category_source IS NOT categories")
+        return self._select(query, limit)
+
+    def set_category(self, results):
+        """Save (url, category, source categories) results of the cleanup stage; category None = invalid"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE articles SET category = ?, category_source = ? WHERE url = ?",
+                [(category, source, url) for url, category, source in results]
+            )
+
+    def _select(self, query, limit=None, params=()):
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(query, params)]
+
+    def iter_articles(self, where="", params=(), batch_size=1000):
+        """Yield stored rows as dicts, batch_size at a time, in insertion order"""
+        last = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT rowid, * FROM articles WHERE rowid > ? {('AND ' + where) if where else ''}"
+                    f" ORDER BY rowid LIMIT {int(batch_size)}", (last, *params)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                row = dict(row)
+                last = row.pop("rowid")
+                yield row
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class StoreSink:
+    """
+    CsvSink counterpart that upserts scraper rows into an ArticleStore, batch_size
+    rows per transaction. Counts of inserted / updated / unchanged rows are kept for
+    the end-of-run summary.
+    """
+
+    def __init__(self, store, site=None, batch_size=200):
+        self.store = store
+        self.site = site
+        self.batch_size = batch_size
+        self.rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self._pending = []
+
+    def write(self, row):
+        self._pending.append(dict(row))
+        self.rows += 1
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        inserted, updated, unchanged = self.store.upsert_many(self._pending, site=self.site)
+        self.inserted += inserted
+        self.updated += updated
+        self.unchanged += unchanged
+        self._pending = []
+
+    def close(self):
+        self.flush()
+
+    def summary(self):
+        return (f"{self.inserted} new, {self.updated} updated, {self.unchanged} unchanged articles "
+                f"in {self.store.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,152 @@
+"""
+Micro-benchmark of HTML parsing on saved pages, for every site in Scrap/configs.
+
+Save a few pages per site once (needs network):
+    python Scrap/bench_parse.py --save --keyword "công ty game" --articles 5
+then time the parsing modes on them as often as you like (offline):
+    python Scrap/bench_parse.py --repeat 5
+
+Modes compared on each page:
+    html.parser  BeautifulSoup(response.text, "html.parser"), the scrapers' old path
+    lxml         lxml backend, decoded from the raw bytes with the declared charset
+    lxml+scoped  as lxml, but only the tags named in the site's selectors are built
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import time
+from urllib.parse import quote_plus
+
+from bs4 import BeautifulSoup
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from flexible_scraper import FlexibleScraper, load_config
+from parsing import PageParser
+from selector_engine import SelectorPlan
+
+CONFIGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "configs")
+
+
+def save_pages(config, pages_dir, keyword, articles):
+    """Fetch page 1 of a search plus the first `articles` results and save their raw bytes"""
+    site = config["site_name"]
+    site_dir = os.path.join(pages_dir, site)
+    os.makedirs(site_dir, exist_ok=True)
+    scraper = FlexibleScraper(config)
+    search_url = config["search_url_pattern"].format(base_url=config["base_url"], keyword=quote_plus(keyword), page=1)
+    urls = [("search", search_url)]
+    urls += [("article", r["Link"]) for r in scraper.get_search_results_page(keyword)[:articles] if r["Link"]]
+
+    index = []
+    for i, (kind, url) in enumerate(urls):
+        try:
+            response = scraper.client.get(url, kind=kind, headers=scraper.headers, timeout=10)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"[{site}] skipping {url}: {e}")
+            continue
+        name = f"{kind}_{i:03d}.html"
+        with open(os.path.join(site_dir, name), "wb") as f:
+            f.write(response.content)
+        index.append({"file": name, "url": url, "kind": kind,
+                      "content_type": response.headers.get("Content-Type", "")})
+    with open(os.path.join(site_dir, "pages.json"), "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    print(f"[{site}] saved {len(index)} pages to {site_dir}")
+
+
+def load_response(path, content_type):
+    """Rebuild the Response the scrapers would have received for a saved page"""
+    response = Response()
+    with open(path, "rb") as f:
+        response._content = f.read()
+    response.status_code = 200
+    response.headers = CaseInsensitiveDict({"Content-Type": content_type})
+    response.encoding = get_encoding_from_headers(response.headers)
+    return response
+
+
+def extract(soup, plan):
+    """Text of every selector in a section, to check the modes agree"""
+    return {name: plan.text(name, soup) for name in plan.selectors}
+
+
+def time_call(func, repeat):
+    """Median wall time of func() in milliseconds, plus its last result"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), result
+
+
+def bench_site(config, pages_dir, repeat):
+    site = config["site_name"]
+    index_file = os.path.join(pages_dir, site, "pages.json")
+    if not os.path.exists(index_file):
+        print(f"[{site}] no saved pages (run with --save first)")
+        return None
+    with open(index_file, encoding="utf-8") as f:
+        index = json.load(f)
+
+    selectors = config.get("selectors") or {}
+    lxml_parser = PageParser("lxml")
+    plans = {kind: SelectorPlan(selectors.get(kind)) for kind in ("search", "article")}
+    scoped = {kind: PageParser("lxml", tags=plan.tag_names) for kind, plan in plans.items()}
+    modes = {"html.parser": [], "lxml": [], "lxml+scoped": []}
+    mismatches = 0
+    for entry in index:
+        path = os.path.join(pages_dir, site, entry["file"])
+        response = load_response(path, entry["content_type"])
+        # response.text is recomputed on every access, so its decoding cost is included
+        ms, full = time_call(lambda: BeautifulSoup(response.text, "html.parser"), repeat)
+        modes["html.parser"].append(ms)
+        ms, _ = time_call(lambda: lxml_parser.parse(response), repeat)
+        modes["lxml"].append(ms)
+        ms, fast = time_call(lambda: scoped[entry["kind"]].parse(response), repeat)
+        modes["lxml+scoped"].append(ms)
+        if entry["kind"] == "article" and extract(full, plans["article"]) != extract(fast, plans["article"]):
+            mismatches += 1
+            print(f"[{site}] scoped extraction differs on {entry['url']}")
+    return {mode: statistics.mean(ms) for mode, ms in modes.items()}, len(index), mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare HTML parsing modes on saved pages of every site")
+    parser.add_argument("--configs-dir", default=CONFIGS_DIR, help="Directory of site configs")
+    parser.add_argument("--pages-dir", default="bench_pages", help="Where saved pages live")
+    parser.add_argument("--save", action="store_true", help="Fetch and save pages instead of benchmarking")
+    parser.add_argument("--keyword", default="công ty game", help="Search keyword used by --save")
+    parser.add_argument("--articles", type=int, default=5, help="Article pages saved per site by --save")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per page and mode")
+    args = parser.parse_args()
+
+    configs = [load_config(f) for f in sorted(glob.glob(os.path.join(args.configs_dir, "*.yaml")))]
+    # Only sites scraped from HTML search pages (not Selenium or JSON API ones) have pages to save
+    configs = [c for c in configs if "search" in (c.get("selectors") or {})
+               and c.get("scraping_method", "html_parsing") == "html_parsing"]
+
+    if args.save:
+        for config in configs:
+            save_pages(config, args.pages_dir, args.keyword, args.articles)
+        return
+
+    print(f"{'site':<12}{'pages':>6}{'html.parser':>14}{'lxml':>10}{'lxml+scoped':>14}{'speedup':>10}")
+    for config in configs:
+        result = bench_site(config, args.pages_dir, args.repeat)
+        if result is None:
+            continue
+        ms, pages, mismatches = result
+        speedup = ms["html.parser"] / ms["lxml+scoped"] if ms["lxml+scoped"] else 0
+        print(f"{config['site_name']:<12}{pages:>6}{ms['html.parser']:>12.1f}ms{ms['lxml']:>8.1f}ms"
+              f"{ms['lxml+scoped']:>12.1f}ms{speedup:>9.1f}x"
+              + (f"  ({mismatches} mismatched pages)" if mismatches else ""))
+
+
+if __name__ == "__main__":
+    main()
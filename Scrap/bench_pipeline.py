@@ -0,0 +1,88 @@
+"""
+Articles/sec of the fetch + parse pipeline against the number of parser processes,
+on article pages from the raw HTML archive (no network).
+
+    python Scrap/bench_pipeline.py --config Scrap/configs/gamek.yaml --processes 0,1,2,4,8
+
+0 processes is the threaded path, where the fetch threads parse pages themselves.
+N > 0 hands raw pages from the fetch threads to a ParsePool of N processes. Each
+"fetch" reads a page from the archive and can wait --latency seconds to stand in
+for the network.
+"""
+import argparse
+import os
+import time
+
+from concurrency import ordered_map
+from extraction import ArticleExtractor, ParsePool
+from flexible_scraper import load_config
+from html_archive import DEFAULT_ARCHIVE_DIR, HtmlArchive, read_record
+from http_client import site_hosts
+from parsing import content_type_charset
+
+
+def load_pages(config, archive_dir, limit):
+    """(content, encoding) of the latest archived fetch of up to `limit` article pages"""
+    archive = HtmlArchive(archive_dir)
+    entries = archive.entries(hosts=site_hosts(config), kind="article")[:limit]
+    archive.close()
+    pages = []
+    for _, _, path, offset, length in entries:
+        record = read_record(path, offset, length)
+        pages.append((record["body"], content_type_charset(record["headers"].get("Content-Type", ""))))
+    return pages
+
+
+def run(config, pages, processes, fetchers, latency):
+    """Seconds to fetch and extract every page with the given number of parser processes"""
+    def fetch(page):
+        if latency:
+            time.sleep(latency)
+        return page
+
+    start = time.perf_counter()
+    if processes == 0:
+        extractor = ArticleExtractor(config)
+        for _ in ordered_map(lambda page: extractor.extract_bytes(*fetch(page)), pages, max_workers=fetchers):
+            pass
+    else:
+        with ParsePool(config, processes) as pool:
+            # Let the processes start before the clock runs
+            list(pool.imap(pages[:processes]))
+            start = time.perf_counter()
+            for _ in pool.imap(ordered_map(fetch, pages, max_workers=fetchers)):
+                pass
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark articles/sec against parser process count')
+    parser.add_argument('--config', required=True, help='Site config whose article selectors are applied')
+    parser.add_argument('--archive-dir', default=DEFAULT_ARCHIVE_DIR, help='Directory of the raw HTML archive')
+    parser.add_argument('--pages', type=int, default=500, help='Archived pages used')
+    parser.add_argument('--processes', default='0,1,2,4,8', help='Comma-separated parser process counts')
+    parser.add_argument('--fetchers', type=int, default=8, help='Fetch threads')
+    parser.add_argument('--latency', type=float, default=0.0, help='Simulated network wait per page in seconds')
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    pages = load_pages(config, args.archive_dir, args.pages)
+    if not pages:
+        print(f"No archived article pages for {config.get('site_name')} in {args.archive_dir}")
+        return
+    mb = sum(len(content) for content, _ in pages) / (1024 * 1024)
+    print(f"{len(pages)} pages ({mb:.1f} MB), {args.fetchers} fetch threads, {args.latency}s latency, "
+          f"{os.cpu_count()} cores")
+
+    print(f"{'processes':>10}{'seconds':>10}{'articles/s':>12}{'speedup':>10}")
+    baseline = None
+    for processes in (int(p) for p in args.processes.split(',')):
+        seconds = run(config, pages, processes, args.fetchers, args.latency)
+        rate = len(pages) / seconds
+        baseline = baseline or rate
+        label = "threads" if processes == 0 else str(processes)
+        print(f"{label:>10}{seconds:>10.2f}{rate:>12.1f}{rate / baseline:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
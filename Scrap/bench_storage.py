@@ -0,0 +1,86 @@
+"""
+Compare the crawl datasets as UTF-8-BOM CSV against zstd Parquet: file size, full
+load time and the load time of single columns (what a dedupe step reading only
+Link, or a report reading only Categories, pays).
+
+    python Scrap/bench_storage.py output/all_sites_20250601_101500.csv
+    python Scrap/bench_storage.py --synthetic 20000
+
+Needs pandas and pyarrow.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import pandas as pd
+
+from frames import read_frame, write_frame
+
+SITES = ["cafef", "dantri", "gamek", "motgame", "tinhte", "viresa", "vnexpress"]
+CATEGORIES = ["Tổng quan ngành video games tại Việt Nam", "Esports in Vietnam",
+              "Việc phát triển games và sử dụng công cụ AIs", "None"]
+WORDS = "ngành công nghiệp game tại Việt Nam đang phát triển mạnh mẽ với hàng triệu người chơi".split()
+
+
+def synthetic_frame(rows):
+    """Articles shaped like the crawl output, with ~4 KB of Vietnamese text each"""
+    random.seed(0)
+    return pd.DataFrame({
+        "Date": [f"{random.randint(1, 28):02d}/05/2025" for _ in range(rows)],
+        "Title": [" ".join(random.choices(WORDS, k=12)) for _ in range(rows)],
+        "Summary": [" ".join(random.choices(WORDS, k=40)) for _ in range(rows)],
+        "Content": ["\n".join(" ".join(random.choices(WORDS, k=60)) for _ in range(15)) for _ in range(rows)],
+        "Link": [f"https://{random.choice(SITES)}.vn/bai-viet-{i}.html" for i in range(rows)],
+        "Keywords": [random.choice(["công ty game", "nhà phát hành game; thiết kế game"]) for _ in range(rows)],
+        "Site": [random.choice(SITES) for _ in range(rows)],
+        "Categories": [random.choice(CATEGORIES) for _ in range(rows)],
+    })
+
+
+def time_load(path, columns, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        read_frame(path, columns)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CSV against Parquet for the article datasets')
+    parser.add_argument('inputs', nargs='*', help='Crawl CSVs to convert (concatenated)')
+    parser.add_argument('--synthetic', type=int, help='Generate this many articles instead of reading CSVs')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed loads per format and projection')
+    args = parser.parse_args()
+    if not args.inputs and not args.synthetic:
+        parser.error('give crawl CSVs or --synthetic N')
+
+    if args.synthetic:
+        df = synthetic_frame(args.synthetic)
+    else:
+        df = pd.concat([read_frame(path) for path in args.inputs], ignore_index=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {"csv": os.path.join(tmp, "articles.csv"), "parquet": os.path.join(tmp, "articles.parquet")}
+        for path in paths.values():
+            write_frame(df, path)
+
+        projections = [("all columns", None), ("Link", ["Link"])]
+        if "Categories" in df.columns:
+            projections.append(("Categories", ["Categories"]))
+
+        print(f"{len(df)} rows, {len(df.columns)} columns")
+        print(f"{'':<14}{'CSV':>12}{'Parquet':>12}{'ratio':>8}")
+        sizes = {fmt: os.path.getsize(path) / (1024 * 1024) for fmt, path in paths.items()}
+        print(f"{'size':<14}{sizes['csv']:>10.1f}MB{sizes['parquet']:>10.1f}MB{sizes['csv'] / sizes['parquet']:>7.1f}x")
+        for label, columns in projections:
+            seconds = {fmt: time_load(path, columns, args.repeat) for fmt, path in paths.items()}
+            print(f"{'load ' + label:<14}{seconds['csv']:>11.3f}s{seconds['parquet']:>11.3f}s"
+                  f"{seconds['csv'] / seconds['parquet']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import math
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+
+def percentile(values, q):
+    """Nearest-rank q-th percentile (0-100) of a non-empty sequence"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class AdaptiveLimit:
+    """
+    In-flight request limit for one host, tuned at runtime by additive increase /
+    multiplicative decrease (AIMD). Each response that comes back while the host is
+    using its whole limit adds 1/limit, i.e. about +1 per round of requests. A
+    429/503, a connection error or timeout, or a median latency over
+    `latency_factor` times the best median seen, multiplies the limit by `decrease`.
+    Requests sent before a decrease don't trigger another one, so a burst of
+    failures only halves the limit once.
+    With adaptive=False the limit stays at `initial`.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=16, adaptive=True, decrease=0.5,
+                 latency_factor=2.0, window=20):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.initial = min(max(initial, self.minimum), self.maximum)
+        self.limit = float(self.initial)
+        self.adaptive = adaptive
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.in_flight = 0
+        self.requests = 0
+        self.increases = 0
+        self.decreases = 0
+        self.lowest = self.highest = self.initial
+        self.best_p50 = None
+        self.latencies = deque(maxlen=window)
+        self.all_latencies = deque(maxlen=10000)
+        self._decreased_at = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Block until a request may be sent; returns a ticket to pass to release()"""
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+            self.requests += 1
+            return self.requests
+
+    def release(self, ticket, latency=None, congested=False):
+        """
+        Free the slot of a finished request. `latency` is its duration in seconds for
+        a usable response (None if it shouldn't count either way); `congested` marks
+        a 429/503, connection error or timeout. Returns True if the limit was lowered.
+        """
+        lowered = False
+        with self._cond:
+            saturated = self.in_flight >= int(self.limit)
+            self.in_flight -= 1
+            if latency is not None:
+                self.all_latencies.append(latency)
+            if self.adaptive:
+                lowered = self._adapt(ticket, latency, congested, saturated)
+            self._cond.notify_all()
+        return lowered
+
+    def _adapt(self, ticket, latency, congested, saturated):
+        if latency is not None and not congested:
+            self.latencies.append(latency)
+            if len(self.latencies) == self.latencies.maxlen:
+                p50 = percentile(self.latencies, 50)
+                if self.best_p50 is None or p50 < self.best_p50:
+                    self.best_p50 = p50
+                # The host is queueing our requests: more parallelism only adds latency
+                congested = p50 > self.latency_factor * self.best_p50
+        if congested:
+            if ticket > self._decreased_at:
+                self.decreases += 1
+                self._decreased_at = self.requests
+                # Latencies measured at the old limit no longer describe the new one
+                self.latencies.clear()
+                return self._set(self.limit * self.decrease)
+        elif latency is not None and saturated:
+            if self._set(self.limit + 1 / self.limit):
+                self.increases += 1
+        return False
+
+    def _set(self, limit):
+        """Clamp and apply a new limit; True if its whole-request value changed"""
+        old = int(self.limit)
+        self.limit = min(max(limit, self.minimum), self.maximum)
+        self.lowest = min(self.lowest, int(self.limit))
+        self.highest = max(self.highest, int(self.limit))
+        return int(self.limit) != old
+
+    def stats(self):
+        with self._cond:
+            latencies = list(self.all_latencies)
+            stats = {"limit": int(self.limit), "initial": self.initial, "lowest": self.lowest,
+                     "highest": self.highest, "increases": self.increases, "decreases": self.decreases,
+                     "requests": self.requests, "adaptive": self.adaptive}
+        if latencies:
+            stats["p50"] = percentile(latencies, 50)
+            stats["p95"] = percentile(latencies, 95)
+        return stats
+
+
+class HostLimiter:
+    """
+    Caps the number of requests in flight against any single host, with one
+    AdaptiveLimit per configured host. Hosts that were never configured are not
+    limited.
+    """
+
+    def __init__(self):
+        self._settings = {}
+        self._limits = {}
+        self._lock = threading.Lock()
+
+    def configure(self, host, **settings):
+        """Set the AdaptiveLimit arguments (initial, minimum, maximum, adaptive...) for a host"""
+        with self._lock:
+            self._settings[host] = settings
+            self._limits.pop(host, None)
+
+    def limit(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._limits:
+                settings = self._settings.get(host)
+                self._limits[host] = AdaptiveLimit(**settings) if settings is not None else None
+            return self._limits[host]
+
+    def stats(self):
+        """Current and extreme limits, adjustments and latency percentiles, per limited host"""
+        with self._lock:
+            limits = dict(self._limits)
+        return {host: limit.stats() for host, limit in limits.items() if limit is not None and limit.requests}
+
+
+# Stop event of the speculative page fetch running on this thread (see prefetch_pages)
+_task = threading.local()
+
+
+def current_stop():
+    """Event set once the result of this thread's speculative fetch is no longer wanted, or None"""
+    return getattr(_task, "stop", None)
+
+
+def ordered_map(func, items, max_workers=8, window=None):
+    """
+    Apply func to every item on a thread pool and yield the results in input order.
+    At most `window` items are in flight at once, so a slow item only holds back
+    the ones queued behind it and memory stays bounded.
+    """
+    window = window or max_workers * 2
+    pending = deque()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # Consumer stopped early (or an item raised): drop queued work and don't
+        # wait for requests that are still in flight
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def prefetch_pages(fetch_page, max_pages, window=1):
+    """
+    Yield (page, results) for pages 1..max_pages in order. With window > 1, up to
+    `window` pages are requested speculatively ahead of the one being consumed;
+    when the consumer stops (e.g. at the first empty page) the pages beyond it
+    are skipped: a page not yet sent isn't sent at all, and the shared client
+    (which checks current_stop()) drops a request still waiting for its rate-limit
+    slot, raising RequestSkipped.
+    """
+    pages = range(1, max_pages + 1)
+    if window <= 1:
+        for page in pages:
+            yield page, fetch_page(page)
+        return
+    stop = threading.Event()
+
+    def fetch(page):
+        if stop.is_set():
+            return []
+        _task.stop = stop
+        try:
+            return fetch_page(page)
+        finally:
+            _task.stop = None
+
+    results = ordered_map(fetch, pages, max_workers=window, window=window)
+    try:
+        yield from zip(pages, results)
+    finally:
+        stop.set()
+        results.close()
@@ -0,0 +1,119 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+
+class CrawlState:
+    """
+    SQLite checkpoint of a single crawl run. It records the config and keywords the run
+    started with, every search page already fetched (keyword, page, results, and the
+    listing's last page where known), and every article already fetched, so an
+    interrupted run can continue without refetching.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_pages ("
+            " keyword TEXT, page INTEGER, results TEXT, last_page INTEGER, PRIMARY KEY (keyword, page))"
+        )
+        # Runs checkpointed before last_page was recorded
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(search_pages)")]
+        if "last_page" not in columns:
+            self._conn.execute("ALTER TABLE search_pages ADD COLUMN last_page INTEGER")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS articles (url TEXT PRIMARY KEY, details TEXT)")
+        self._conn.commit()
+
+    @classmethod
+    def create(cls, state_dir, config, keywords, run_id=None):
+        """Start a new run; the run id defaults to <site_name>_<timestamp>"""
+        os.makedirs(state_dir, exist_ok=True)
+        if run_id is None:
+            run_id = f"{config.get('site_name', 'scraped')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        state = cls(os.path.join(state_dir, f"{run_id}.sqlite"))
+        state.run_id = run_id
+        state._set_meta("config", json.dumps(config))
+        state._set_meta("keywords", json.dumps(keywords))
+        state._set_meta("finished", "0")
+        return state
+
+    @classmethod
+    def open(cls, state_dir, run_id):
+        """Reopen an existing run for --resume"""
+        path = os.path.join(state_dir, f"{run_id}.sqlite")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No crawl state for run '{run_id}' in {state_dir}")
+        state = cls(path)
+        state.run_id = run_id
+        return state
+
+    def _set_meta(self, key, value):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+            self._conn.commit()
+
+    def _get_meta(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @property
+    def config(self):
+        return json.loads(self._get_meta("config"))
+
+    @property
+    def keywords(self):
+        return json.loads(self._get_meta("keywords"))
+
+    @property
+    def finished(self):
+        return self._get_meta("finished") == "1"
+
+    def search_page(self, keyword, page):
+        """Results recorded for a search page, or None if it hasn't been fetched yet"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT results FROM search_pages WHERE keyword = ? AND page = ?", (keyword, page)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def record_search_page(self, keyword, page, results, last_page=None):
+        """Save a fetched search page, with the keyword's last page if the listing reported it"""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO search_pages VALUES (?, ?, ?, ?)",
+                               (keyword, page, json.dumps(results, ensure_ascii=False), last_page))
+            self._conn.commit()
+
+    def last_page(self, keyword):
+        """Last page of a keyword's listing as recorded with its pages, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(last_page) FROM search_pages WHERE keyword = ? AND last_page IS NOT NULL", (keyword,)
+            ).fetchone()
+        return row[0]
+
+    def completed_articles(self):
+        """Map of article URL -> details for every article already fetched"""
+        with self._lock:
+            rows = self._conn.execute("SELECT url, details FROM articles").fetchall()
+        return {url: json.loads(details) for url, details in rows}
+
+    def record_article(self, url, details):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO articles VALUES (?, ?)",
+                               (url, json.dumps(details, ensure_ascii=False)))
+            self._conn.commit()
+
+    def mark_finished(self):
+        self._set_meta("finished", "1")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
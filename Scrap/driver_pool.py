@@ -0,0 +1,105 @@
+import threading
+from contextlib import contextmanager
+
+from selenium.common.exceptions import WebDriverException
+
+
+class DriverPool:
+    """
+    Bounded pool of Selenium drivers shared by worker threads.
+    At most `size` drivers exist at once; each is leased to one task at a time and
+    reused by the next. A driver is quit and replaced once it has served `max_pages`
+    pages, or when it no longer responds (crashed browser or lost session).
+    """
+
+    def __init__(self, factory, size=2, max_pages=50):
+        self.factory = factory
+        self.size = size
+        self.max_pages = max_pages
+        self.created = 0
+        self.recycled = 0
+        self.crashed = 0
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = []
+        self._pages = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @staticmethod
+    def _alive(driver):
+        try:
+            driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _acquire(self):
+        while True:
+            with self._lock:
+                driver = self._idle.pop() if self._idle else None
+            if driver is None:
+                driver = self.factory()
+                with self._lock:
+                    self.created += 1
+                    self._pages[id(driver)] = 0
+                return driver
+            if self._alive(driver):
+                return driver
+            self._discard(driver, "crashed")
+
+    def _discard(self, driver, counter=None):
+        """Quit a driver for good, bumping the `crashed` or `recycled` counter"""
+        with self._lock:
+            self._pages.pop(id(driver), None)
+            if counter:
+                setattr(self, counter, getattr(self, counter) + 1)
+        self._quit(driver)
+
+    def record_pages(self, driver, pages):
+        """Count pages loaded by a leased driver towards its recycle limit"""
+        with self._lock:
+            self._pages[id(driver)] = self._pages.get(id(driver), 0) + pages
+
+    @contextmanager
+    def driver(self):
+        """Lease a driver for the duration of the block"""
+        with self._slots:
+            driver = self._acquire()
+            try:
+                yield driver
+            except WebDriverException:
+                # The session may be unusable; never hand it to another task
+                self._discard(driver, "crashed")
+                raise
+            except BaseException:
+                self._release(driver)
+                raise
+            else:
+                self._release(driver)
+
+    def _release(self, driver):
+        with self._lock:
+            worn_out = self._pages.get(id(driver), 0) >= self.max_pages
+            keep = not self._closed and not worn_out
+            if keep:
+                self._idle.append(driver)
+        if not keep:
+            self._discard(driver, "recycled" if worn_out else None)
+
+    def stats(self):
+        return {"size": self.size, "created": self.created, "recycled": self.recycled, "crashed": self.crashed}
+
+    def close(self):
+        """Quit idle drivers; drivers still leased are quit when they come back"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            self._quit(driver)
@@ -0,0 +1,97 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from parsing import page_parser
+from selector_engine import SelectorPlan
+
+
+def empty_details():
+    """Article details of a page that couldn't be fetched or parsed"""
+    return {"Date": "", "Title_detail": "", "Summary_detail": "", "Content": ""}
+
+
+class ArticleExtractor:
+    """
+    The article half of a site config: compiled article selectors plus the parser
+    scoped to them. Extraction needs no network, so it also runs on archived pages
+    (see reextract.py) and in parser processes (see ParsePool).
+    """
+
+    def __init__(self, config):
+        self.plan = SelectorPlan((config.get('selectors') or {}).get('article'))
+        self.parser = page_parser(config, self.plan.tag_names)
+
+    def extract(self, soup):
+        """Article details from a parsed page"""
+        plan = self.plan
+        return {
+            "Date": plan.text('date', soup),
+            "Title_detail": plan.text('title', soup),
+            "Summary_detail": plan.text('summary', soup),
+            "Content": plan.text('content', soup, separator="\n")
+        }
+
+    def extract_bytes(self, content, encoding=None):
+        """Article details from raw page bytes, decoded with the declared charset"""
+        return self.extract(self.parser.parse_bytes(content, encoding))
+
+
+# Set in each parser process by _init_worker
+_extractor = None
+
+
+def _init_worker(config):
+    global _extractor
+    _extractor = ArticleExtractor(config)
+
+
+def _extract_page(page):
+    content, encoding = page
+    return _extractor.extract_bytes(content, encoding)
+
+
+class ParsePool:
+    """
+    Pool of processes running a site's ArticleExtractor on raw page bytes, so parsing
+    scales with cores instead of sharing the GIL with the threads waiting on the
+    network. At most `window` pages are queued or being parsed at once: imap() stops
+    pulling pages from its input until the oldest one is parsed, which in turn holds
+    back the fetchers feeding it.
+    """
+
+    def __init__(self, config, processes, window=None):
+        self.processes = processes
+        self.window = window or processes * 2
+        self._executor = ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(config,))
+
+    def imap(self, pages):
+        """
+        Yield article details for each (content, encoding) page in input order; a page
+        of None (failed fetch) yields empty details
+        """
+        pending = deque()
+        for page in pages:
+            pending.append(self._executor.submit(_extract_page, page) if page is not None else None)
+            if len(pending) >= self.window:
+                yield self._result(pending.popleft())
+        while pending:
+            yield self._result(pending.popleft())
+
+    @staticmethod
+    def _result(future):
+        if future is None:
+            return empty_details()
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"Error parsing article: {e}")
+            return empty_details()
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
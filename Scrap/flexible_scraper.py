@@ -1,21 +1,32 @@
 import requests
 import os
-from bs4 import BeautifulSoup
-import csv
-import time
-from datetime import datetime
 import argparse
 import json
 import yaml
+from contextlib import closing
 from urllib.parse import quote_plus
+from concurrency import ordered_map, prefetch_pages
+from http_client import DEFAULT_ARCHIVE_DIR, DEFAULT_CACHE_DIR, get_client
+from parsing import declared_charset, page_parser
+from extraction import ArticleExtractor, ParsePool, empty_details
+from selector_engine import SelectorPlan
+from json_api import JsonListing, field_paths
+from crawl_state import CrawlState
+from sinks import open_sink
+from article_store import DEFAULT_STORE_PATH, ArticleStore, StoreSink
+
+# Keys of get_article_details' result for each article selector name
+DETAIL_KEYS = {"title": "Title_detail", "summary": "Summary_detail", "content": "Content", "date": "Date"}
 
 class FlexibleScraper:
-    def __init__(self, config):
+    def __init__(self, config, state=None):
         """
         Initialize the scraper with configuration
         config: dict containing website configuration
+        state: optional CrawlState used to checkpoint (and resume) the crawl
         """
         self.config = config
+        self.state = state
         self.headers = {
             "User-Agent": (
                 "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -27,12 +38,68 @@ class FlexibleScraper:
         self.search_url_pattern = config['search_url_pattern']
         self.selectors = config['selectors']
 
+        # html_parsing (default) scrapes search result pages; json_api reads listings from a JSON endpoint
+        self.scraping_method = config.get('scraping_method', 'html_parsing')
+
+        # Selectors are compiled once and reused for every page
+        if self.scraping_method == 'json_api':
+            self.listing = JsonListing(self.selectors.get('search'))
+            self.search_plan = SelectorPlan(None)
+        else:
+            self.listing = None
+            self.search_plan = SelectorPlan(self.selectors.get('search'))
+        self.article_extractor = ArticleExtractor(config)
+        self.article_plan = self.article_extractor.plan
+        # Article fields read from the listing item instead of the page (`field:` selectors)
+        self.listing_fields = {
+            DETAIL_KEYS[name]: field_paths(spec)
+            for name, spec in self.article_plan.options.items()
+            if name in DETAIL_KEYS and field_paths(spec)
+        }
+        # Last page of each keyword's listing, once the API has said so
+        self.last_pages = {}
+
+        # Backend and scope of HTML parsing (see the `parsing` block of the config)
+        self.search_parser = page_parser(config, self.search_plan.tag_names)
+        self.article_parser = self.article_extractor.parser
+
+        # Article pages are fetched serially unless max_workers > 1; the client caps
+        # (and tunes) the number of requests in flight to each host
+        concurrency = config.get('concurrency') or {}
+        self.max_workers = concurrency.get('max_workers', 1)
+        # With parse_processes > 0, pages are parsed in a pool of processes instead
+        # of on the fetch threads
+        self.parse_processes = concurrency.get('parse_processes', 0)
+        # Number of search result pages requested ahead of the one being parsed
+        self.search_prefetch = concurrency.get('search_prefetch', 1)
+
+        # All requests go through the shared pooled client
+        self.client = get_client()
+        self.client.configure_site(config)
+
     def get_search_results_page(self, keyword, page=1):
         """Get search results for a given keyword and page number"""
+        # Pages finished by an earlier attempt of this run are replayed from the checkpoint
+        if self.state is not None:
+            recorded = self.state.search_page(keyword, page)
+            if recorded is not None:
+                print(f"Page {page} for keyword '{keyword}' restored from checkpoint")
+                # The listing's end is known without asking the API again
+                last_page = self.state.last_page(keyword)
+                if last_page is not None:
+                    self.last_pages.setdefault(keyword, last_page)
+                return recorded
+
+        # Pages beyond the end the API reported are not requested at all
+        last_page = self.last_pages.get(keyword)
+        if last_page is not None and page > last_page:
+            return []
+
         # Properly encode the keyword for URL
         encoded_keyword = quote_plus(keyword)
         search_url = self.search_url_pattern.format(
             base_url=self.base_url,
+            api_url=self.config.get('api_url', ''),
             keyword=encoded_keyword,
             page=page
         )
@@ -40,131 +107,241 @@ class FlexibleScraper:
         print(f"Searching URL: {search_url}")  # Debug print
         
         try:
-            response = requests.get(search_url, headers=self.headers, timeout=10)
+            response = self.client.get(search_url, kind="search", headers=self.headers, timeout=10)
             response.raise_for_status()
         except requests.exceptions.RequestException as e:
             print(f"Error fetching search results: {e}")
             return []
 
-        soup = BeautifulSoup(response.text, "html.parser")
-        articles = soup.find_all(self.selectors['search']['article_container']['tag'],
-                               class_=self.selectors['search']['article_container'].get('class'))
+        if self.listing is not None:
+            try:
+                results = self.parse_json_results(response.json(), keyword, page)
+            except ValueError as e:
+                print(f"Error decoding JSON search results: {e}")
+                return []
+        else:
+            results = self.parse_html_results(response, page)
+
+        print(f"Successfully extracted {len(results)} articles from page {page}")  # Debug print
+        if self.state is not None:
+            self.state.record_search_page(keyword, page, results, self.last_pages.get(keyword))
+        return results
+
+    def parse_json_results(self, data, keyword, page):
+        """Search results from one page of a JSON listing (scraping_method: json_api)"""
+        listing = self.listing
+        # Known from the first response where the API reports it, so later pages can be skipped
+        last_page = listing.last_page(data)
+        if last_page is not None:
+            self.last_pages[keyword] = last_page
+        elif listing.is_last(data, page):
+            self.last_pages[keyword] = page
+        items = listing.items(data)
+        print(f"Found {len(items)} items on page {page}")  # Debug print
+
+        results = []
+        for item in items:
+            link = listing.link(item, {'base_url': self.base_url.rstrip('/'), 'api_url': self.config.get('api_url', '')})
+            if link and not link.startswith('http'):
+                link = f"{self.base_url.rstrip('/')}/{link.lstrip('/')}"
+            results.append({
+                "Title_search": listing.text(item, listing.title_paths),
+                "Summary_search": listing.text(item, listing.summary_paths),
+                "Link": link,
+                "Fields": {key: listing.text(item, paths) for key, paths in self.listing_fields.items()}
+            })
+        return results
+
+    def parse_html_results(self, response, page):
+        """Search results from one HTML search page"""
+        soup = self.search_parser.parse(response)
+        search = self.search_plan
+        articles = search.find_all('article_container', soup)
         
         print(f"Found {len(articles)} article containers on page {page}")  # Debug print
         
         results = []
         for art in articles:
             # Extract title
-            title_tag = art.find(self.selectors['search']['title']['tag'],
-                               class_=self.selectors['search']['title'].get('class'))
+            title_tag = search.find('title', art)
             if not title_tag:
                 continue
             title = title_tag.get_text(strip=True)
             
-            # Extract link
-            link_tag = title_tag.find('a') if self.selectors['search']['link'].get('inside_title') else art.find('a')
-            link = link_tag['href'] if link_tag else ""
+            # Extract link: a configured link selector, else the first <a> in the title or container
+            if 'link' in search.selectors:
+                link_tag = search.find('link', art)
+            elif (search.options.get('link') or {}).get('inside_title'):
+                link_tag = title_tag.find('a')
+            else:
+                link_tag = art.find('a')
+            link = link_tag.get('href', '') if link_tag else ""
             if link and not link.startswith('http'):
                 link = f"{self.base_url.rstrip('/')}/{link.lstrip('/')}"
             
             # Extract summary
-            summary_tag = art.find(self.selectors['search']['summary']['tag'],
-                                 class_=self.selectors['search']['summary'].get('class'))
-            summary = summary_tag.get_text(strip=True) if summary_tag else ""
+            summary = search.text('summary', art)
             
             results.append({
                 "Title_search": title,
                 "Summary_search": summary,
                 "Link": link
             })
-        
-        print(f"Successfully extracted {len(results)} articles from page {page}")  # Debug print
         return results
 
-    def get_all_search_results(self, keyword, max_pages=10):
-        """Get all search results across multiple pages"""
+    def get_all_search_results(self, keyword, max_pages=10, seen=None):
+        """
+        Get all search results across multiple pages, requesting up to `search_prefetch`
+        pages speculatively. Pagination stops at the first empty page, or early once a
+        page holds only links already in `seen` (links found by earlier keywords) or on
+        earlier pages of this keyword; pages requested beyond that point are skipped.
+        """
+        seen = seen if seen is not None else set()
         all_results = []
-        for page in range(1, max_pages + 1):
-            print(f"Getting page {page} for keyword '{keyword}'...")
-            page_results = self.get_search_results_page(keyword, page=page)
-            if not page_results:
-                print(f"No results found on page {page}. Stopping pagination for keyword '{keyword}'")
-                break
-            all_results.extend(page_results)
-            time.sleep(1)
+        keyword_links = set()
+        pages = self.iter_search_pages(keyword, max_pages)
+        with closing(pages):
+            for page, page_results in pages:
+                print(f"Got page {page} for keyword '{keyword}'")
+                if not page_results:
+                    print(f"No results found on page {page}. Stopping pagination for keyword '{keyword}'")
+                    break
+                all_results.extend(page_results)
+                last_page = self.last_pages.get(keyword)
+                if last_page is not None and page >= last_page:
+                    print(f"Page {page} is the last one reported by the API for keyword '{keyword}'")
+                    break
+                if all(r["Link"] in seen or r["Link"] in keyword_links for r in page_results):
+                    print(f"Page {page} only has already-seen links. Stopping pagination for keyword '{keyword}'")
+                    break
+                keyword_links.update(r["Link"] for r in page_results)
         print(f"Total articles found for keyword '{keyword}': {len(all_results)}")
         return all_results
 
-    def get_article_details(self, url):
-        """Get detailed article information"""
+    def iter_search_pages(self, keyword, max_pages):
+        """
+        Yield (page, results) for a keyword's search pages in order, up to
+        `search_prefetch` of them requested ahead. A JSON listing that reports its
+        last page has page 1 fetched alone first, so no page past the end is requested.
+        """
+        first = 1
+        if self.listing is not None and self.search_prefetch > 1:
+            yield 1, self.get_search_results_page(keyword, page=1)
+            first = 2
+            last_page = self.last_pages.get(keyword)
+            if last_page is not None:
+                max_pages = min(max_pages, last_page)
+        pages = prefetch_pages(lambda page: self.get_search_results_page(keyword, page=page + first - 1),
+                               max_pages - first + 1, window=self.search_prefetch)
+        with closing(pages):
+            for page, page_results in pages:
+                yield page + first - 1, page_results
+
+    def discover(self, keywords):
+        """
+        Search every keyword and merge the hits by link, so each article is fetched once.
+        Returns the unique search results in first-seen order, each with the list of
+        keywords that matched it under "Keywords".
+        """
+        found = {}
+        for keyword in keywords:
+            print(f"Searching for keyword: {keyword}")
+            for result in self.get_all_search_results(keyword, max_pages=10, seen=found):
+                url = result["Link"]
+                if not url:
+                    continue
+                if url in found:
+                    if keyword not in found[url]["Keywords"]:
+                        found[url]["Keywords"].append(keyword)
+                else:
+                    result["Keywords"] = [keyword]
+                    found[url] = result
+        print(f"Unique articles across all keywords: {len(found)}")
+        return list(found.values())
+
+    def fetch_article_page(self, url):
+        """Raw bytes and declared charset of an article page, or None if it couldn't be fetched"""
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.client.get(url, headers=self.headers, timeout=10)
             response.raise_for_status()
         except requests.exceptions.RequestException as e:
             print(f"Error fetching article details: {e}")
-            return {"Date": "", "Title_detail": "", "Summary_detail": "", "Content": ""}
-        
-        soup = BeautifulSoup(response.text, "html.parser")
-        
-        # Extract title
-        title_tag = soup.find(self.selectors['article']['title']['tag'],
-                            class_=self.selectors['article']['title'].get('class'))
-        title = title_tag.get_text(strip=True) if title_tag else ""
-        
-        # Extract summary
-        summary_tag = soup.find(self.selectors['article']['summary']['tag'],
-                              class_=self.selectors['article']['summary'].get('class'))
-        summary = summary_tag.get_text(strip=True) if summary_tag else ""
-        
-        # Extract content
-        content_tag = soup.find(self.selectors['article']['content']['tag'],
-                              class_=self.selectors['article']['content'].get('class'))
-        content = content_tag.get_text(separator="\n", strip=True) if content_tag else ""
-        
-        # Extract date
-        date_tag = soup.find(self.selectors['article']['date']['tag'],
-                           class_=self.selectors['article']['date'].get('class'))
-        date = date_tag.get_text(strip=True) if date_tag else ""
-        
-        return {
-            "Date": date,
-            "Title_detail": title,
-            "Summary_detail": summary,
-            "Content": content
-        }
+            return None
+        return response.content, declared_charset(response)
+
+    def get_article_details(self, url):
+        """Get detailed article information"""
+        # Every field comes from the JSON listing; the page itself isn't needed
+        if not self.article_plan.selectors:
+            return empty_details()
+        page = self.fetch_article_page(url)
+        if page is None:
+            return empty_details()
+        return self.article_extractor.extract_bytes(*page)
+
+    def iter_article_details(self, urls):
+        """
+        Yield article details for urls in order: serially, on a thread pool, or with
+        fetch threads handing raw pages to a pool of parser processes
+        """
+        if self.parse_processes > 0 and self.article_plan.selectors:
+            if self.max_workers <= 1:
+                pages = map(self.fetch_article_page, urls)
+            else:
+                pages = ordered_map(self.fetch_article_page, urls, max_workers=self.max_workers)
+            with ParsePool(self.config, self.parse_processes) as pool:
+                yield from pool.imap(pages)
+            return
+        if self.max_workers <= 1:
+            for url in urls:
+                yield self.get_article_details(url)
+            return
+        yield from ordered_map(self.get_article_details, urls, max_workers=self.max_workers)
 
     def crawl(self, keywords):
-        """Main crawling function"""
-        all_articles = []
+        """
+        Main crawling function. A generator: each article record is yielded as soon as
+        its details are in, so callers can stream records to disk or a later stage.
+        """
         count = 1
         
-        for keyword in keywords:
-            print(f"Searching for keyword: {keyword}")
-            search_results = self.get_all_search_results(keyword, max_pages=10)
-            
-            for result in search_results:
-                url = result["Link"]
-                if not url:
-                    continue
-                
-                article_details = self.get_article_details(url)
-                
-                final_title = article_details["Title_detail"] or result["Title_search"]
-                final_summary = article_details["Summary_detail"] or result["Summary_search"]
-                
-                article_data = {
-                    "No": count,
-                    "Date": article_details["Date"],
-                    "Title": final_title,
-                    "Summary": final_summary,
-                    "Content": article_details["Content"],
-                    "Link": url
-                }
-                all_articles.append(article_data)
-                count += 1
-                time.sleep(1)
+        search_results = self.discover(keywords)
+        
+        # Articles already fetched by an earlier attempt of this run are not fetched again
+        done = self.state.completed_articles() if self.state is not None else {}
+        if done:
+            print(f"Resuming: {len(done)} articles restored from checkpoint")
+        details = self.iter_article_details([r["Link"] for r in search_results if r["Link"] not in done])
         
-        return all_articles
+        for result in search_results:
+            url = result["Link"]
+            if url in done:
+                article_details = done[url]
+            else:
+                article_details = next(details)
+                # Failed fetches come back empty; leave them out so a resume retries them
+                if self.state is not None and any(article_details.values()):
+                    self.state.record_article(url, article_details)
+            
+            # JSON listings carry some article fields themselves
+            for key, value in (result.get("Fields") or {}).items():
+                if value and not article_details.get(key):
+                    article_details = {**article_details, key: value}
+            
+            final_title = article_details["Title_detail"] or result["Title_search"]
+            final_summary = article_details["Summary_detail"] or result["Summary_search"]
+            
+            article_data = {
+                "No": count,
+                "Date": article_details["Date"],
+                "Title": final_title,
+                "Summary": final_summary,
+                "Content": article_details["Content"],
+                "Link": url,
+                "Keywords": "; ".join(result["Keywords"])
+            }
+            yield article_data
+            count += 1
 
 def load_config(config_file):
     """Load configuration from YAML or JSON file"""
@@ -179,39 +356,98 @@ def load_config(config_file):
 
 def main():
     parser = argparse.ArgumentParser(description='Flexible Web Scraper')
-    parser.add_argument('--config', required=True, help='Path to configuration file (YAML or JSON)')
-    parser.add_argument('--keywords', required=True, help='Comma-separated list of keywords to search for')
+    parser.add_argument('--config', help='Path to configuration file (YAML or JSON)')
+    parser.add_argument('--keywords', help='Comma-separated list of keywords to search for (default: the config\'s categories)')
     parser.add_argument('--output-dir', default='output', help='Output directory for CSV files')
+    parser.add_argument('--workers', type=int, help='Number of article pages fetched concurrently (1 = serial)')
+    parser.add_argument('--per-host', type=int, help='Concurrent requests to a single host to start from')
+    parser.add_argument('--parse-processes', type=int, help='Parse article pages in this many processes (0 = on the fetch threads)')
+    parser.add_argument('--fixed-per-host', action='store_true', help='Keep the per-host limit fixed instead of adapting it')
+    parser.add_argument('--no-hedge', action='store_true', help='Never send backup copies of slow requests')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help='Directory of the persistent HTTP response cache')
+    parser.add_argument('--cache-max-mb', type=int, default=500, help='Size limit of the response cache in MB')
+    parser.add_argument('--no-cache', action='store_true', help='Always fetch pages from the network')
+    parser.add_argument('--archive-dir', default=DEFAULT_ARCHIVE_DIR, help='Directory of the raw HTML archive')
+    parser.add_argument('--no-archive', action='store_true', help='Don\'t archive fetched pages')
+    parser.add_argument('--state-dir', default='crawl_state', help='Directory holding crawl checkpoints')
+    parser.add_argument('--resume', metavar='RUN_ID', help='Continue an interrupted run from its checkpoint')
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH, help='SQLite article store the records are upserted into')
+    parser.add_argument('--no-store', action='store_true', help='Only write the CSV')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help='Output file format (parquet needs pyarrow)')
+    parser.add_argument('--rotate-mb', type=float, help='Start a new CSV part once the current one reaches this size')
     args = parser.parse_args()
+    if not args.resume and not args.config:
+        parser.error('--config is required unless --resume is given')
+
+    # Load configuration (a resumed run reuses the config and keywords it started with)
+    if args.resume:
+        state = CrawlState.open(args.state_dir, args.resume)
+        config = state.config
+        keywords = state.keywords
+    else:
+        config = load_config(args.config)
+        if args.keywords:
+            keywords = [k.strip() for k in args.keywords.split(',')]
+        elif config.get('categories'):
+            # Category listings (e.g. a JSON API's category slugs) stand in for keywords
+            keywords = list(config['categories'])
+        else:
+            parser.error('--keywords is required for configs without categories')
 
-    # Load configuration
-    config = load_config(args.config)
+    # Command-line concurrency settings override the config file
+    concurrency = config.get('concurrency') or {}
+    if args.workers is not None:
+        concurrency['max_workers'] = args.workers
+    if args.per_host is not None:
+        concurrency['per_host'] = args.per_host
+    if args.parse_processes is not None:
+        concurrency['parse_processes'] = args.parse_processes
+    if args.fixed_per_host:
+        concurrency['adaptive'] = False
+    # Without a block or overrides, the client's default per-host limits apply
+    if concurrency:
+        config['concurrency'] = concurrency
+    if args.no_hedge:
+        config.pop('hedge', None)
+    if not args.resume:
+        state = CrawlState.create(args.state_dir, config, keywords)
+    print(f"Run id: {state.run_id} (continue an interrupted run with --resume {state.run_id})")
     
     # Initialize scraper
-    scraper = FlexibleScraper(config)
-    
-    # Parse keywords
-    keywords = [k.strip() for k in args.keywords.split(',')]
-    
-    # Run scraper
-    articles = scraper.crawl(keywords)
+    scraper = FlexibleScraper(config, state=state)
+    if not args.no_cache:
+        scraper.client.enable_cache(args.cache_dir, max_bytes=args.cache_max_mb * 1024 * 1024)
+    if not args.no_archive:
+        scraper.client.enable_archive(args.archive_dir)
     
     # Create output directory
     os.makedirs(args.output_dir, exist_ok=True)
     
-    # Generate output filename
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    site_name = config.get('site_name', 'scraped')
-    csv_file = os.path.join(args.output_dir, f"{site_name}_{timestamp}.csv")
+    # Output file is named after the run, so a resumed run writes the same file
+    output_file = os.path.join(args.output_dir, f"{state.run_id}.{args.format}")
+    rotate_bytes = int(args.rotate_mb * 1024 * 1024) if args.rotate_mb else None
     
-    # Save results
-    with open(csv_file, mode="w", newline="", encoding="utf-8-sig") as f:
-        writer = csv.DictWriter(f, fieldnames=["No", "Date", "Title", "Summary", "Content", "Link"])
-        writer.writeheader()
-        for art in articles:
-            writer.writerow(art)
+    # Run scraper, streaming each record to disk (and the article store) as it completes
+    stored = None if args.no_store else StoreSink(ArticleStore(args.store), site=config.get('site_name'))
+    try:
+        with open_sink(output_file, rotate_bytes=rotate_bytes) as sink:
+            for art in scraper.crawl(keywords):
+                sink.write(art)
+                if stored is not None:
+                    stored.write(art)
+    except KeyboardInterrupt:
+        print(f"\nInterrupted. Progress is checkpointed; resume with --resume {state.run_id}")
+        raise SystemExit(130)
+    finally:
+        if stored is not None:
+            stored.close()
+            stored.store.close()
     
-    print(f"Data saved to {csv_file}")
+    state.mark_finished()
+    print(f"{sink.rows} articles saved to {', '.join(sink.paths)}")
+    if stored is not None:
+        print(f"Store: {stored.summary()}")
+    scraper.client.report()
     print("Crawling completed successfully.")
 
 if __name__ == "__main__":
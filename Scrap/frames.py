@@ -0,0 +1,71 @@
+import csv
+import os
+
+import pandas as pd
+
+from sinks import DICTIONARY_FIELDS, HAVE_PYARROW
+
+if HAVE_PYARROW:
+    import pyarrow.parquet as pq
+
+# Crawl CSVs hold a whole article per row
+csv.field_size_limit(2 ** 31 - 1)
+
+
+def is_parquet(path):
+    return path.endswith(".parquet")
+
+
+def site_from_filename(path):
+    """dantri_20250530_184654.csv -> dantri, vnexpress_news_... -> vnexpress"""
+    return os.path.splitext(os.path.basename(path))[0].split("_")[0]
+
+
+def _require_pyarrow():
+    if not HAVE_PYARROW:
+        raise RuntimeError("Parquet files need pyarrow (pip install pyarrow)")
+
+
+def read_frame(path, columns=None):
+    """
+    Load an article dataset as a DataFrame, from CSV (UTF-8 BOM, as the scrapers
+    write it) or Parquet by extension. With `columns`, only those are loaded; for
+    Parquet the other columns (e.g. Content) are never even read from disk.
+    """
+    if is_parquet(path):
+        _require_pyarrow()
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, encoding="utf-8-sig", usecols=columns)
+
+
+def write_frame(df, path):
+    """Save a DataFrame as CSV, or as zstd Parquet with Site/Categories dictionary-encoded"""
+    if not is_parquet(path):
+        df.to_csv(path, index=False, encoding="utf-8-sig")
+        return
+    _require_pyarrow()
+    dictionary = [name for name in DICTIONARY_FIELDS if name in df.columns]
+    # Categoricals become Arrow dictionaries, and load back as categoricals
+    df = df.astype({name: "category" for name in dictionary})
+    df.to_parquet(path, index=False, compression="zstd", use_dictionary=dictionary)
+
+
+def read_columns(path):
+    """Column names of a CSV or Parquet dataset, without reading its rows"""
+    if is_parquet(path):
+        _require_pyarrow()
+        return pq.ParquetFile(path).schema_arrow.names
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return next(csv.reader(f), [])
+
+
+def iter_rows(path, columns=None, batch_size=10000):
+    """Stream the rows of a CSV or Parquet dataset as dicts, batch_size rows in memory at a time"""
+    if is_parquet(path):
+        _require_pyarrow()
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=columns):
+            yield from batch.to_pylist()
+        return
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            yield {name: row.get(name) for name in columns} if columns else row
@@ -0,0 +1,93 @@
+import threading
+from collections import deque
+from urllib.parse import urlparse
+
+from concurrency import percentile
+
+
+class HedgePolicy:
+    """
+    When to send a second copy of a slow request to one host. Once `min_samples`
+    responses have been seen, a request still unanswered after the `percentile`-th
+    latency of the recent ones gets a backup; whichever answers first is used.
+    Backups are capped at `max_ratio` of all requests, so a host that is slow
+    across the board sees at most that much extra load.
+    """
+
+    def __init__(self, percentile=95, max_ratio=0.05, min_samples=20, window=200, min_delay=0.05):
+        self.percentile = percentile
+        self.max_ratio = max_ratio
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.requests = 0
+        self.hedged = 0
+        self.backup_wins = 0
+        self._window = deque(maxlen=window)
+        # Every latency of the run, for the report: as the first copy alone would
+        # have taken, and as the caller actually waited
+        self.primary_latencies = deque(maxlen=10000)
+        self.latencies = deque(maxlen=10000)
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Count a request; returns seconds to wait before hedging it, or None to never hedge"""
+        with self._lock:
+            self.requests += 1
+            if len(self._window) < self.min_samples:
+                return None
+            return max(self.min_delay, percentile(self._window, self.percentile))
+
+    def allow(self):
+        """Claim a backup request if the budget has room for one"""
+        with self._lock:
+            if self.hedged + 1 > self.max_ratio * self.requests:
+                return False
+            self.hedged += 1
+            return True
+
+    def record_primary(self, latency):
+        with self._lock:
+            self._window.append(latency)
+            self.primary_latencies.append(latency)
+
+    def record_result(self, latency, backup_won=False):
+        with self._lock:
+            self.latencies.append(latency)
+            if backup_won:
+                self.backup_wins += 1
+
+    def stats(self):
+        with self._lock:
+            stats = {"requests": self.requests, "hedged": self.hedged, "backup_wins": self.backup_wins}
+            if self.primary_latencies and self.latencies:
+                stats["p99_unhedged"] = percentile(self.primary_latencies, 99)
+                stats["p99"] = percentile(self.latencies, 99)
+        return stats
+
+
+class HostHedges:
+    """HedgePolicy per host, for the hosts whose site config has a `hedge` block"""
+
+    def __init__(self):
+        self._settings = {}
+        self._policies = {}
+        self._lock = threading.Lock()
+
+    def configure(self, host, **settings):
+        with self._lock:
+            self._settings[host] = settings
+            self._policies.pop(host, None)
+
+    def policy(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._policies:
+                settings = self._settings.get(host)
+                self._policies[host] = HedgePolicy(**settings) if settings is not None else None
+            return self._policies[host]
+
+    def stats(self):
+        with self._lock:
+            policies = dict(self._policies)
+        return {host: p.stats() for host, p in policies.items() if p is not None and p.requests}
+
@@ -0,0 +1,166 @@
+import gzip
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+from requests.structures import CaseInsensitiveDict
+
+from http_cache import DROP_HEADERS, normalize_url
+
+DEFAULT_ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".html_archive")
+
+
+def _warc_date(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _header_lines(block):
+    """Parse "Name: value" lines into a dict"""
+    headers = {}
+    for line in block.split(b"\r\n"):
+        name, sep, value = line.decode("utf-8", "replace").partition(":")
+        if sep:
+            headers[name.strip()] = value.strip()
+    return headers
+
+
+def read_record(path, offset, length):
+    """
+    Read one archived response from a segment. Returns a dict with url, fetched_at,
+    status, headers and body (the decoded page bytes).
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        record = gzip.decompress(f.read(length))
+    warc_block, _, http = record.partition(b"\r\n\r\n")
+    warc = _header_lines(warc_block)
+    http = http[:int(warc["Content-Length"])]
+    head, _, body = http.partition(b"\r\n\r\n")
+    status_line, _, header_block = head.partition(b"\r\n")
+    return {
+        "url": warc["WARC-Target-URI"],
+        "fetched_at": warc["WARC-Date"],
+        "status": int(status_line.split()[1]),
+        "headers": CaseInsensitiveDict(_header_lines(header_block)),
+        "body": body,
+    }
+
+
+class HtmlArchive:
+    """
+    Append-only archive of every page fetched, so pages can be re-extracted later
+    without the network. Each response is written as a WARC/1.0 `response` record in
+    its own gzip member, so any record can be read by seeking to its offset (and the
+    segments stay readable by standard WARC tools). Segments are per process, named
+    after the time and pid that opened them, and rotated at max_segment_bytes. A
+    SQLite index maps (url, fetched_at) to segment, offset and length.
+    """
+
+    def __init__(self, directory=DEFAULT_ARCHIVE_DIR, max_segment_bytes=1024 * 1024 * 1024):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.stored = 0
+        self.bytes_written = 0
+        self._segment = None
+        self._file = None
+        self._segments_opened = 0
+        self._lock = threading.Lock()
+        # Several crawler processes may share one archive, as they share the cache
+        self._conn = sqlite3.connect(os.path.join(directory, "index.sqlite"), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            " key TEXT, url TEXT, host TEXT, kind TEXT, status INTEGER, fetched_at REAL,"
+            " segment TEXT, offset INTEGER, length INTEGER)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS records_key ON records (key, fetched_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS records_host ON records (host, kind)")
+        self._conn.commit()
+
+    def _open_segment(self):
+        if self._file is not None:
+            self._file.close()
+        self._segments_opened += 1
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self._segment = f"archive_{stamp}_{os.getpid()}_{self._segments_opened:03d}.warc.gz"
+        self._file = open(os.path.join(self.directory, self._segment), "ab")
+
+    @staticmethod
+    def _record(response, url, fetched_at):
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in DROP_HEADERS}
+        body = response.content
+        head = [f"HTTP/1.1 {response.status_code} {response.reason or ''}".rstrip()]
+        head += [f"{k}: {v}" for k, v in headers.items()]
+        head.append(f"Content-Length: {len(body)}")
+        http = ("\r\n".join(head) + "\r\n\r\n").encode("utf-8") + body
+        warc = "\r\n".join([
+            "WARC/1.0",
+            "WARC-Type: response",
+            f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>",
+            f"WARC-Date: {_warc_date(fetched_at)}",
+            f"WARC-Target-URI: {url}",
+            "Content-Type: application/http;msgtype=response",
+            f"Content-Length: {len(http)}",
+        ])
+        return gzip.compress(warc.encode("utf-8") + b"\r\n\r\n" + http + b"\r\n\r\n")
+
+    def store(self, url, response, kind="article"):
+        """Append a response to the current segment and index it"""
+        url = response.url or url
+        fetched_at = time.time()
+        record = self._record(response, url, fetched_at)
+        with self._lock:
+            if self._file is None or self._file.tell() >= self.max_segment_bytes:
+                self._open_segment()
+            offset = self._file.tell()
+            self._file.write(record)
+            self._file.flush()
+            self._conn.execute(
+                "INSERT INTO records VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (normalize_url(url), url, urlparse(url).netloc, kind, response.status_code, fetched_at,
+                 self._segment, offset, len(record))
+            )
+            self._conn.commit()
+            self.stored += 1
+            self.bytes_written += len(record)
+
+    def entries(self, hosts=None, kind=None, latest=True):
+        """
+        Index rows (url, fetched_at, path, offset, length) in fetch order, optionally
+        only for some hosts and kind. With latest=True each URL appears once, at its
+        most recent fetch.
+        """
+        query = "SELECT url, MAX(fetched_at) AS fetched_at, segment, offset, length FROM records" if latest else \
+            "SELECT url, fetched_at, segment, offset, length FROM records"
+        where, params = [], []
+        if hosts:
+            where.append(f"host IN ({', '.join('?' * len(hosts))})")
+            params += list(hosts)
+        if kind:
+            where.append("kind = ?")
+            params.append(kind)
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        if latest:
+            # SQLite returns the other columns from the row holding the MAX()
+            query += " GROUP BY key"
+        query += " ORDER BY fetched_at"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [(url, fetched_at, os.path.join(self.directory, segment), offset, length)
+                for url, fetched_at, segment, offset, length in rows]
+
+    def stats(self):
+        return {"stored": self.stored, "bytes_written": self.bytes_written}
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._conn.close()
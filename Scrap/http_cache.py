@@ -0,0 +1,131 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Hop-by-hop / transfer headers that no longer describe a cached, decoded body
+DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+
+def normalize_url(url):
+    """
+    Canonical cache key for a URL: lower-case scheme and host, default port dropped,
+    query parameters sorted and the fragment removed.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port is None or (scheme, port) in (("http", 80), ("https", 443)):
+        netloc = host
+    else:
+        netloc = f"{host}:{port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+class ResponseCache:
+    """
+    On-disk HTTP response cache stored in a single SQLite file.
+    Entries are keyed by normalized URL, keep ETag/Last-Modified for conditional
+    revalidation, and are evicted least-recently-used once the total body size
+    exceeds max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes=500 * 1024 * 1024):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # Several crawler processes may share one cache, so wait on locks rather than fail
+        self._conn = sqlite3.connect(os.path.join(directory, "cache.sqlite"), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, url TEXT, status INTEGER, headers TEXT, body BLOB,"
+            " etag TEXT, last_modified TEXT, stored_at REAL, accessed_at REAL, size INTEGER)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+        self._conn.commit()
+        self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def lookup(self, url):
+        """Return the cached entry for url as a dict, or None"""
+        key = normalize_url(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, status, headers, body, etag, last_modified, stored_at FROM entries WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return {
+            "url": row[0],
+            "status": row[1],
+            "headers": json.loads(row[2]),
+            "body": zlib.decompress(row[3]),
+            "etag": row[4],
+            "last_modified": row[5],
+            "stored_at": row[6],
+        }
+
+    def store(self, url, response):
+        """Save a successful response, then evict old entries if the cache is over budget"""
+        key = normalize_url(url)
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in DROP_HEADERS}
+        body = zlib.compress(response.content)
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, response.url or url, response.status_code, json.dumps(headers), body,
+                 response.headers.get("ETag"), response.headers.get("Last-Modified"), now, now, len(body))
+            )
+            self._total += len(body) - (old[0] if old else 0)
+            self._evict()
+            self._conn.commit()
+
+    def refresh(self, url):
+        """Mark an entry as fresh again after the server answered 304 Not Modified"""
+        with self._lock:
+            self._conn.execute("UPDATE entries SET stored_at = ? WHERE key = ?", (time.time(), normalize_url(url)))
+            self._conn.commit()
+
+    def _evict(self):
+        if self._total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC").fetchall()
+        for key, size in rows:
+            if self._total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._total -= size
+            self.evictions += 1
+
+    def count(self, counter):
+        """Bump one of the hits / revalidated / misses counters"""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size_bytes": self._total,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
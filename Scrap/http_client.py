@@ -0,0 +1,585 @@
+import os
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from concurrency import HostLimiter, current_stop
+from hedge import HostHedges
+from html_archive import DEFAULT_ARCHIVE_DIR, HtmlArchive
+from http_cache import ResponseCache
+from rate_limit import DomainRateLimiter
+from retry import RETRY_EXCEPTIONS, HostBreakers, RetryPolicy
+
+# urllib3 only decodes brotli bodies when one of these packages is installed,
+# so only advertise "br" when we can actually read it.
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = "gzip, deflate, br"
+    except ImportError:
+        ACCEPT_ENCODING = "gzip, deflate"
+
+# HTTP/2 is optional: it needs httpx with the h2 extra (pip install "httpx[http2]")
+try:
+    import httpx
+    import h2  # noqa: F401
+except ImportError:
+    httpx = None
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/90.0.4430.93 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Encoding": ACCEPT_ENCODING,
+    "Connection": "keep-alive",
+}
+
+# Response cache location and freshness defaults (seconds); sites override the TTLs
+# in the `cache` block of their config
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".http_cache")
+DEFAULT_TTLS = {"search": 60 * 60, "article": 30 * 24 * 60 * 60}
+
+# Threads sending requests of hosts with hedging on (both copies run on them)
+HEDGE_THREADS = 64
+
+
+class RequestSkipped(requests.exceptions.RequestException):
+    """A speculative request dropped before it was sent, its result no longer wanted"""
+
+
+def build_response(request, status_code, headers, content, url=None, reason=None):
+    """Assemble a requests.Response from already-decoded parts"""
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers = CaseInsensitiveDict(headers)
+    response._content = content
+    response.url = url or (request.url if request is not None else "")
+    response.reason = reason
+    response.request = request
+    response.encoding = get_encoding_from_headers(response.headers)
+    return response
+
+
+def site_hosts(config):
+    """Return every host a site config talks to (base, search and API URLs)"""
+    urls = [config.get('base_url', ''), config.get('api_url', '')]
+    pattern = config.get('search_url_pattern', '')
+    if pattern:
+        urls.append(pattern.format(
+            base_url=config.get('base_url', ''),
+            api_url=config.get('api_url', ''),
+            keyword='', page=1
+        ))
+    return {urlparse(url).netloc for url in urls if url and urlparse(url).netloc}
+
+
+class DnsCache:
+    """Process-wide getaddrinfo cache so repeated requests skip DNS resolution"""
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._getaddrinfo = None
+
+    def install(self):
+        if self._getaddrinfo is None:
+            self._getaddrinfo = socket.getaddrinfo
+            socket.getaddrinfo = self.getaddrinfo
+
+    def getaddrinfo(self, host, port, *args, **kwargs):
+        key = (host, port, args, tuple(sorted(kwargs.items())))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+        result = self._getaddrinfo(host, port, *args, **kwargs)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (now + self.ttl, result)
+        return result
+
+
+# socket.getaddrinfo is patched for the whole process, so every client shares one cache
+_dns_cache = None
+_dns_lock = threading.Lock()
+
+
+def shared_dns_cache(ttl=300):
+    """The process-wide DnsCache, installed on first use; the first caller's ttl applies"""
+    global _dns_cache
+    with _dns_lock:
+        if _dns_cache is None:
+            _dns_cache = DnsCache(ttl)
+            _dns_cache.install()
+        return _dns_cache
+
+
+class Http2Adapter(BaseAdapter):
+    """
+    Transport adapter that sends requests through an httpx client with HTTP/2 enabled.
+    Servers that don't offer h2 over ALPN transparently get HTTP/1.1 on the same client.
+    """
+
+    def __init__(self, max_connections=20):
+        super().__init__()
+        self.connections_opened = 0
+        self.requests_sent = 0
+        self._lock = threading.Lock()
+        self._client = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    def _trace(self, event_name, info):
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connections_opened += 1
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        with self._lock:
+            self.requests_sent += 1
+        try:
+            resp = self._client.request(
+                request.method, request.url,
+                headers=dict(request.headers),
+                content=request.body,
+                timeout=timeout,
+                extensions={"trace": self._trace},
+            )
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(e, request=request)
+        except httpx.HTTPError as e:
+            raise requests.exceptions.ConnectionError(e, request=request)
+        # httpx has already decoded the body, so the encoding header no longer applies
+        headers = {k: v for k, v in resp.headers.items() if k.lower() != "content-encoding"}
+        return build_response(request, resp.status_code, headers, resp.content,
+                              url=str(resp.url), reason=resp.reason_phrase)
+
+    def close(self):
+        self._client.close()
+
+
+class HttpClient:
+    """
+    Shared HTTP layer for all scrapers: one pooled keep-alive session per host,
+    compressed transfers, optional HTTP/2 and a DNS cache, with reuse counters.
+    Every request first waits for its host's rate limiter. An optional on-disk
+    response cache serves fresh pages locally and revalidates stale ones.
+    Failed requests are retried per the host's RetryPolicy, and a per-host circuit
+    breaker fails requests fast while a site keeps failing. Requests in flight to a
+    configured host are capped by a limit that adapts to its latency and errors.
+    Optionally, a request still unanswered at the host's p95 latency is hedged
+    with a second copy.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=20, http2=True, dns_ttl=300, headers=None,
+                 default_rate=1.0, timeout=15):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.http2 = http2 and httpx is not None
+        self.headers = dict(DEFAULT_HEADERS)
+        self.headers.update(headers or {})
+        self.host_settings = {}
+        self.rate_limiter = DomainRateLimiter(default_rate)
+        # Used when the caller doesn't pass a timeout, so no request can hang forever
+        self.timeout = timeout
+        self.retry_policies = {}
+        self.default_retry = RetryPolicy()
+        self.breakers = HostBreakers()
+        self.retries = {}
+        self.host_limiter = HostLimiter()
+        self.hedges = HostHedges()
+        self._hedge_pool = None
+        self.cache = None
+        self.archive = None
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self.dns_cache = shared_dns_cache(dns_ttl) if dns_ttl else None
+
+    def configure_host(self, host, **settings):
+        """Override pool_maxsize / http2 / timeout for one host (applies to sessions created afterwards)"""
+        self.host_settings.setdefault(host, {}).update(settings)
+
+    def configure_site(self, config):
+        """
+        Apply the optional `http`, `rate_limit`, `cache`, `retry`, `circuit_breaker`,
+        `concurrency` and `hedge` blocks of a site config to every host of that site
+        """
+        concurrency = config.get('concurrency')
+        hedge = config.get('hedge')
+        rate_limit = config.get('rate_limit')
+        retry = config.get('retry')
+        circuit_breaker = config.get('circuit_breaker')
+        settings = dict(config.get('http') or {})
+        # search_ttl / article_ttl
+        settings.update(config.get('cache') or {})
+        # Never let the pool be smaller than the number of threads that may share it
+        workers = (concurrency or {}).get('max_workers', 1)
+        settings['pool_maxsize'] = max(settings.get('pool_maxsize', self.pool_maxsize), workers)
+        # per_host is where the in-flight limit starts; it can grow up to max_per_host
+        limits = None
+        if concurrency is not None:
+            limits = {
+                'initial': concurrency.get('per_host', 4),
+                'minimum': concurrency.get('min_per_host', 1),
+                'maximum': concurrency.get('max_per_host', workers),
+                'adaptive': concurrency.get('adaptive', True),
+            }
+        for host in site_hosts(config):
+            self.configure_host(host, **settings)
+            if rate_limit is not None:
+                self.rate_limiter.configure(host, rate_limit.get('requests_per_second'),
+                                            rate_limit.get('burst', 1))
+            if retry is not None:
+                self.retry_policies[host] = RetryPolicy(**retry)
+            if circuit_breaker is not None:
+                self.breakers.configure(host, **circuit_breaker)
+            if limits is not None:
+                self.host_limiter.configure(host, **limits)
+            if hedge:
+                self.hedges.configure(host, **hedge)
+
+    def enable_cache(self, directory=DEFAULT_CACHE_DIR, max_bytes=500 * 1024 * 1024):
+        """Turn on the persistent response cache"""
+        self.cache = ResponseCache(directory, max_bytes=max_bytes)
+
+    def enable_archive(self, directory=DEFAULT_ARCHIVE_DIR):
+        """Append every page fetched from the network to an HtmlArchive"""
+        self.archive = HtmlArchive(directory)
+
+    def cache_ttl(self, url, kind):
+        """Freshness lifetime for a "search" or "article" page of the host of url"""
+        settings = self.host_settings.get(urlparse(url).netloc, {})
+        return settings.get(f"{kind}_ttl", DEFAULT_TTLS[kind])
+
+    def _new_session(self, host):
+        settings = self.host_settings.get(host, {})
+        pool_maxsize = settings.get('pool_maxsize', self.pool_maxsize)
+        session = requests.Session()
+        session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=settings.get('pool_connections', self.pool_connections),
+                              pool_maxsize=pool_maxsize)
+        session.mount("http://", adapter)
+        if settings.get('http2', self.http2) and httpx is not None:
+            session.mount("https://", Http2Adapter(max_connections=pool_maxsize))
+        else:
+            session.mount("https://", adapter)
+        return session
+
+    def session_for(self, url):
+        """Return the pooled session for the host of url, creating it on first use"""
+        host = urlparse(url).netloc
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = self._sessions[host] = self._new_session(host)
+            return session
+
+    def get(self, url, kind="article", **kwargs):
+        """
+        GET url through the pooled session of its host. With the cache enabled, fresh
+        entries are returned without touching the network and stale ones are revalidated
+        with a conditional GET. `kind` ("search" or "article") picks the site's TTL.
+        With the archive enabled, every page fetched from the network is appended to it.
+        """
+        entry = None
+        if self.cache is not None:
+            entry = self.cache.lookup(url)
+            if entry is not None and time.time() - entry["stored_at"] < self.cache_ttl(url, kind):
+                self.cache.count("hits")
+                return build_response(None, entry["status"], entry["headers"], entry["body"], url=entry["url"])
+            if entry is not None:
+                headers = dict(kwargs.get("headers") or {})
+                if entry["etag"]:
+                    headers["If-None-Match"] = entry["etag"]
+                if entry["last_modified"]:
+                    headers["If-Modified-Since"] = entry["last_modified"]
+                kwargs["headers"] = headers
+
+        response = self._send(url, **kwargs)
+
+        if self.archive is not None and response.status_code == 200:
+            self.archive.store(url, response, kind)
+
+        if self.cache is not None:
+            if response.status_code == 304 and entry is not None:
+                self.cache.refresh(url)
+                self.cache.count("revalidated")
+                return build_response(None, entry["status"], entry["headers"], entry["body"], url=entry["url"])
+            self.cache.count("misses")
+            if response.status_code == 200:
+                self.cache.store(url, response)
+        return response
+
+    @staticmethod
+    def _record_failure(breaker, host):
+        """Count a failed attempt; True if it opened the host's breaker"""
+        if breaker.record_failure():
+            print(f"Circuit breaker opened for {host} after repeated failures")
+            return True
+        return False
+
+    def _send(self, url, **kwargs):
+        """
+        Send a GET, retrying connection errors, timeouts and retryable statuses with
+        jittered exponential backoff (or the server's Retry-After). Raises
+        CircuitOpenError while the host's breaker is open. After the last attempt, or
+        once the breaker opens, a retryable response is returned as-is and an
+        exception is re-raised.
+        """
+        host = urlparse(url).netloc
+        policy = self.retry_policies.get(host, self.default_retry)
+        breaker = self.breakers.breaker(url)
+        limit = self.host_limiter.limit(url)
+        hedge = self.hedges.policy(url)
+        kwargs.setdefault("timeout", self.host_settings.get(host, {}).get("timeout", self.timeout))
+        # Set when this is a prefetched page the caller has stopped wanting
+        stop = current_stop()
+        attempt = 0
+        while True:
+            self._check_stop(url, stop)
+            trial = breaker.before_request(host)
+            try:
+                if hedge is None:
+                    response = self._limited_get(url, limit, stop, **kwargs)
+                else:
+                    response = self._hedged_get(url, limit, hedge, stop, **kwargs)
+            except RequestSkipped:
+                # Never sent, so neither a success nor a failure of the host
+                if trial:
+                    breaker.cancel_trial()
+                raise
+            except RETRY_EXCEPTIONS as e:
+                # Once this failure opens the breaker, retrying would only be rejected
+                if self._record_failure(breaker, host) or attempt >= policy.retries:
+                    raise
+                delay = policy.delay(attempt)
+                reason = type(e).__name__
+            except Exception:
+                # Not retried, but still an outcome: a half-open trial must not stay pending
+                self._record_failure(breaker, host)
+                raise
+            else:
+                if not policy.should_retry(response):
+                    breaker.record_success()
+                    return response
+                if self._record_failure(breaker, host) or attempt >= policy.retries:
+                    return response
+                delay = policy.delay(attempt, response)
+                reason = f"HTTP {response.status_code}"
+            with self._lock:
+                self.retries[host] = self.retries.get(host, 0) + 1
+            print(f"Retry {attempt + 1}/{policy.retries} for {url} in {delay:.1f}s ({reason})")
+            time.sleep(delay)
+            attempt += 1
+
+    def _wait_turn(self, url, stop):
+        """Wait for the host's rate limiter, raising RequestSkipped (token returned) if `stop` is set meanwhile"""
+        if not self.rate_limiter.acquire(url, stop):
+            raise RequestSkipped(f"Skipped {url}: no longer needed")
+
+    @staticmethod
+    def _check_stop(url, stop):
+        if stop is not None and stop.is_set():
+            raise RequestSkipped(f"Skipped {url}: no longer needed")
+
+    def _limited_get(self, url, limit, stop=None, **kwargs):
+        """
+        One GET, holding a slot of the host's in-flight limit (if it has one) and
+        reporting the outcome back to it. Raises RequestSkipped instead of sending if
+        `stop` is set while waiting for the rate limiter.
+        """
+        if limit is None:
+            self._wait_turn(url, stop)
+            return self.session_for(url).get(url, **kwargs)
+        ticket = limit.acquire()
+        latency = None
+        congested = False
+        try:
+            self._wait_turn(url, stop)
+            start = time.monotonic()
+            response = self.session_for(url).get(url, **kwargs)
+            if response.status_code in (429, 503):
+                congested = True
+            elif response.status_code < 500:
+                latency = time.monotonic() - start
+            return response
+        except RETRY_EXCEPTIONS:
+            congested = True
+            raise
+        finally:
+            if limit.release(ticket, latency, congested):
+                print(f"Concurrency for {urlparse(url).netloc} lowered to {int(limit.limit)}")
+
+    def _hedged_get(self, url, limit, hedge, stop=None, **kwargs):
+        """
+        _limited_get, plus a backup copy of the request if the first hasn't answered
+        within the host's hedge delay and the hedge budget allows. The first
+        successful response wins; the other is closed when it arrives.
+        """
+        delay = hedge.start()
+        start = time.monotonic()
+        if delay is None:
+            # Not enough latencies seen yet to know what "slow" means for this host
+            response = self._limited_get(url, limit, stop, **kwargs)
+            hedge.record_primary(time.monotonic() - start)
+            hedge.record_result(time.monotonic() - start)
+            return response
+
+        def primary_done(future):
+            if future.exception() is None:
+                hedge.record_primary(time.monotonic() - start)
+
+        pool = self._hedge_executor()
+        primary = pool.submit(self._limited_get, url, limit, stop, **kwargs)
+        primary.add_done_callback(primary_done)
+        if wait([primary], timeout=delay).done or not hedge.allow():
+            response = primary.result()
+            hedge.record_result(time.monotonic() - start)
+            return response
+
+        backup = pool.submit(self._limited_get, url, limit, stop, **kwargs)
+        done, _ = wait([primary, backup], return_when=FIRST_COMPLETED)
+        winner = next((f for f in (primary, backup) if f in done and f.exception() is None), None)
+        if winner is None:
+            # The copy that finished first failed; the other one may still succeed
+            wait([primary, backup])
+            winner = primary if primary.exception() is None else backup
+        loser = backup if winner is primary else primary
+        loser.add_done_callback(self._close_response)
+        response = winner.result()
+        hedge.record_result(time.monotonic() - start, backup_won=winner is backup)
+        return response
+
+    @staticmethod
+    def _close_response(future):
+        if future.exception() is None:
+            future.result().close()
+
+    def _hedge_executor(self):
+        with self._lock:
+            if self._hedge_pool is None:
+                self._hedge_pool = ThreadPoolExecutor(max_workers=HEDGE_THREADS, thread_name_prefix="hedge")
+            return self._hedge_pool
+
+    def stats(self):
+        """Connection reuse counters summed over every host"""
+        requests_sent = 0
+        connections_opened = 0
+        with self._lock:
+            sessions = list(self._sessions.values())
+        for session in sessions:
+            for adapter in set(session.adapters.values()):
+                if isinstance(adapter, Http2Adapter):
+                    requests_sent += adapter.requests_sent
+                    connections_opened += adapter.connections_opened
+                elif isinstance(adapter, HTTPAdapter):
+                    pools = adapter.poolmanager.pools
+                    for key in list(pools.keys()):
+                        pool = pools.get(key)
+                        if pool is not None:
+                            requests_sent += pool.num_requests
+                            connections_opened += pool.num_connections
+        stats = {
+            "hosts": len(sessions),
+            "requests": requests_sent,
+            "connections_opened": connections_opened,
+            "connections_reused": max(requests_sent - connections_opened, 0),
+        }
+        if self.dns_cache:
+            stats["dns_hits"] = self.dns_cache.hits
+            stats["dns_misses"] = self.dns_cache.misses
+        return stats
+
+    def report(self):
+        stats = self.stats()
+        print(f"HTTP: {stats['requests']} requests to {stats['hosts']} hosts over "
+              f"{stats['connections_opened']} connections ({stats['connections_reused']} reused)")
+        if self.dns_cache:
+            print(f"DNS cache: {stats['dns_hits']} hits, {stats['dns_misses']} misses")
+        if self.cache is not None:
+            cache = self.cache.stats()
+            print(f"Cache: {cache['hits']} hits, {cache['revalidated']} revalidated (304), "
+                  f"{cache['misses']} misses, {cache['evictions']} evicted, "
+                  f"{cache['size_bytes'] / (1024 * 1024):.1f} MB on disk")
+        if self.archive is not None:
+            archive = self.archive.stats()
+            print(f"Archive: {archive['stored']} pages, {archive['bytes_written'] / (1024 * 1024):.1f} MB "
+                  f"appended to {self.archive.directory}")
+        for host, limits in self.rate_limiter.stats().items():
+            print(f"Rate limit {host}: {limits['requests']} requests at {limits['rate']}/s, "
+                  f"{limits['waited']}s spent waiting")
+        with self._lock:
+            retries = dict(self.retries)
+        for host, count in retries.items():
+            print(f"Retries {host}: {count}")
+        for host, limit in self.host_limiter.stats().items():
+            latency = (f", latency p50 {limit['p50']:.2f}s p95 {limit['p95']:.2f}s" if "p50" in limit else "")
+            if limit['adaptive']:
+                print(f"Concurrency {host}: settled at {limit['limit']} in flight (started at {limit['initial']}, "
+                      f"ranged {limit['lowest']}-{limit['highest']}, {limit['increases']} increases, "
+                      f"{limit['decreases']} decreases){latency}")
+            else:
+                print(f"Concurrency {host}: fixed at {limit['limit']} in flight{latency}")
+        for host, hedge in self.hedges.stats().items():
+            rate = hedge['hedged'] / hedge['requests'] * 100
+            line = (f"Hedging {host}: {hedge['hedged']} of {hedge['requests']} requests hedged ({rate:.1f}%), "
+                    f"backup answered first {hedge['backup_wins']} times")
+            if "p99" in hedge:
+                line += f"; p99 latency {hedge['p99_unhedged']:.2f}s unhedged, {hedge['p99']:.2f}s hedged"
+            print(line)
+        for host, breaker in self.breakers.stats().items():
+            print(f"Circuit breaker {host}: tripped {breaker['trips']} times, "
+                  f"{breaker['rejected']} requests rejected while open")
+
+    def close(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            hedge_pool, self._hedge_pool = self._hedge_pool, None
+        if hedge_pool is not None:
+            hedge_pool.shutdown(wait=False)
+        for session in sessions:
+            session.close()
+        if self.cache is not None:
+            self.cache.close()
+        if self.archive is not None:
+            self.archive.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide HttpClient shared by every scraper"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
+
+
+def get(url, **kwargs):
+    """Drop-in replacement for requests.get that goes through the shared client"""
+    return get_client().get(url, **kwargs)
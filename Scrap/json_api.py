@@ -0,0 +1,113 @@
+import re
+
+_TEMPLATE_FIELD = re.compile(r"\{([^{}]+)\}")
+
+
+def get_path(data, path):
+    """
+    Value at a dotted path such as "meta.last_page" or "data.0.title" (list items by
+    index), or None when any step is missing.
+    """
+    for key in str(path).split("."):
+        if isinstance(data, dict):
+            data = data.get(key)
+        elif isinstance(data, list) and key.lstrip("-").isdigit() and -len(data) <= int(key) < len(data):
+            data = data[int(key)]
+        else:
+            return None
+        if data is None:
+            return None
+    return data
+
+
+def fill_template(template, item, extra=None):
+    """
+    Fill "{base_url}/{category.slug}/{slug}" from `extra` (e.g. base_url) and the
+    item's dotted paths. Returns "" if any placeholder has no value, so an item that
+    can't be linked is skipped rather than linked wrongly.
+    """
+    extra = extra or {}
+    missing = False
+
+    def value(match):
+        nonlocal missing
+        name = match.group(1)
+        found = extra[name] if name in extra else get_path(item, name)
+        if found in (None, ""):
+            missing = True
+            return ""
+        return str(found)
+
+    filled = _TEMPLATE_FIELD.sub(value, template)
+    return "" if missing else filled
+
+
+def field_paths(spec):
+    """Field paths of a spec: "a.b", {field: "a.b"}, or a list of either as fallbacks"""
+    if spec is None:
+        return []
+    if isinstance(spec, list):
+        return [p for s in spec for p in field_paths(s)]
+    if isinstance(spec, dict):
+        return field_paths(spec.get("field"))
+    return [spec]
+
+
+class JsonListing:
+    """
+    The `search` section of a `scraping_method: json_api` config, read once:
+      items: data                        path to the list of items in each response
+      last_page: [last_page, meta.last_page]   optional pagination metadata
+      next: links.next                   optional; an empty value marks the last page
+      title: {field: title}
+      summary: {field: description}
+      link: {template: "{base_url}/{slug}"}
+    A list of paths is tried in order, like a selector fallback chain.
+    """
+
+    def __init__(self, section):
+        section = section or {}
+        self.items_path = section.get("items", "data")
+        self.last_page_paths = field_paths(section.get("last_page"))
+        self.next_paths = field_paths(section.get("next"))
+        self.title_paths = field_paths(section.get("title", "title"))
+        self.summary_paths = field_paths(section.get("summary"))
+        link = section.get("link") or {}
+        self.link_template = link.get("template") if isinstance(link, dict) else link
+        self.link_paths = field_paths(link) if isinstance(link, dict) and "field" in link else []
+
+    @staticmethod
+    def first(data, paths):
+        for path in paths:
+            value = get_path(data, path)
+            if value not in (None, ""):
+                return value
+        return None
+
+    def items(self, data):
+        items = get_path(data, self.items_path) if self.items_path else data
+        return items if isinstance(items, list) else []
+
+    def last_page(self, data):
+        """Last page number from the pagination metadata, or None if the response has none"""
+        value = self.first(data, self.last_page_paths)
+        try:
+            return int(value) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    def is_last(self, data, page):
+        """Whether `page` is the final page according to the response's metadata"""
+        last_page = self.last_page(data)
+        if last_page is not None and page >= last_page:
+            return True
+        return bool(self.next_paths) and self.first(data, self.next_paths) is None
+
+    def text(self, item, paths):
+        value = self.first(item, paths)
+        return "" if value is None else str(value).strip()
+
+    def link(self, item, extra=None):
+        if self.link_template:
+            return fill_template(self.link_template, item, extra)
+        return self.text(item, self.link_paths)
@@ -0,0 +1,161 @@
+import argparse
+import glob
+import multiprocessing
+import os
+import queue
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from flexible_scraper import FlexibleScraper, load_config
+from http_client import DEFAULT_ARCHIVE_DIR, DEFAULT_CACHE_DIR
+from article_store import DEFAULT_STORE_PATH, ArticleStore, StoreSink
+from sinks import ARTICLE_FIELDS, open_sink
+
+CONFIGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "configs")
+
+# Same keyword list the per-site scripts search for
+DEFAULT_KEYWORDS = [
+    "trò chơi điện tử",
+    "công ty game",
+    "nhà phát hành game",
+    "nhà lập trình game",
+    "nhà làm game",
+    "thiết kế game"
+]
+
+# Merged output carries the site each record came from
+OUTPUT_FIELDS = ARTICLE_FIELDS[:1] + ["Site"] + ARTICLE_FIELDS[1:]
+
+
+def can_crawl(config):
+    """Whether FlexibleScraper can run this config (it needs search selectors)"""
+    return 'search' in (config.get('selectors') or {})
+
+
+def run_site(config_file, keywords, records, options):
+    """
+    Crawl one site in a worker process, pushing ("record", site, article) messages onto
+    the shared queue and finishing with ("done", site, count) or ("error", site, message).
+    """
+    config = load_config(config_file)
+    site = config.get('site_name', os.path.splitext(os.path.basename(config_file))[0])
+    count = 0
+    try:
+        # Per-site concurrency budget: the site's own setting, capped by the orchestrator.
+        # A site without a concurrency block keeps the client's defaults.
+        concurrency = config.get('concurrency')
+        if concurrency is not None and options.get('max_workers_per_site'):
+            concurrency['max_workers'] = min(concurrency.get('max_workers', 1), options['max_workers_per_site'])
+
+        # Sites listed by category (e.g. a JSON API) crawl their categories instead of the keywords
+        if config.get('categories'):
+            keywords = list(config['categories'])
+
+        scraper = FlexibleScraper(config)
+        if options.get('cache_dir'):
+            scraper.client.enable_cache(options['cache_dir'])
+        if options.get('archive_dir'):
+            scraper.client.enable_archive(options['archive_dir'])
+        for article in scraper.crawl(keywords):
+            records.put(("record", site, article))
+            count += 1
+        print(f"[{site}] finished with {count} articles")
+        scraper.client.report()
+        records.put(("done", site, count))
+    except Exception as e:
+        records.put(("error", site, f"{type(e).__name__}: {e}"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Crawl every site in Scrap/configs in parallel into one CSV')
+    parser.add_argument('--configs-dir', default=CONFIGS_DIR, help='Directory of site configs (YAML or JSON)')
+    parser.add_argument('--sites', help='Comma-separated site names to run (default: every config)')
+    parser.add_argument('--keywords', help='Comma-separated keywords (default: the standard gaming keyword list)')
+    parser.add_argument('--output-dir', default='output', help='Output directory for the merged CSV')
+    parser.add_argument('--processes', type=int, help='Sites crawled at the same time (default: all of them)')
+    parser.add_argument('--max-workers-per-site', type=int, help='Cap on each site\'s concurrency.max_workers')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help='Directory of the shared HTTP response cache')
+    parser.add_argument('--no-cache', action='store_true', help='Always fetch pages from the network')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help='Output file format (parquet needs pyarrow)')
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH, help='SQLite article store the records are upserted into')
+    parser.add_argument('--no-store', action='store_true', help='Only write the merged CSV')
+    parser.add_argument('--archive-dir', default=DEFAULT_ARCHIVE_DIR, help='Directory of the raw HTML archive')
+    parser.add_argument('--no-archive', action='store_true', help='Don\'t archive fetched pages')
+    args = parser.parse_args()
+
+    keywords = [k.strip() for k in args.keywords.split(',')] if args.keywords else DEFAULT_KEYWORDS
+    wanted = {s.strip() for s in args.sites.split(',')} if args.sites else None
+
+    config_files = []
+    for config_file in sorted(glob.glob(os.path.join(args.configs_dir, '*.yaml')) +
+                              glob.glob(os.path.join(args.configs_dir, '*.json'))):
+        config = load_config(config_file)
+        site = config.get('site_name', os.path.splitext(os.path.basename(config_file))[0])
+        if wanted is not None and site not in wanted:
+            continue
+        if not can_crawl(config):
+            print(f"Skipping {site}: config has no search selectors")
+            continue
+        config_files.append(config_file)
+    if not config_files:
+        print("No crawlable site configs found.")
+        return
+
+    options = {
+        'max_workers_per_site': args.max_workers_per_site,
+        'cache_dir': None if args.no_cache else args.cache_dir,
+        'archive_dir': None if args.no_archive else args.archive_dir,
+    }
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_file = os.path.join(args.output_dir, f"all_sites_{timestamp}.{args.format}")
+
+    # Workers stream records back through a bounded queue, so a fast site can't
+    # outrun the writer by more than a few thousand articles
+    manager = multiprocessing.Manager()
+    records = manager.Queue(maxsize=2000)
+    processes = args.processes or len(config_files)
+    print(f"Crawling {len(config_files)} sites with {processes} processes")
+
+    # Only this process writes the store; records carry their Site
+    stored = None if args.no_store else StoreSink(ArticleStore(args.store))
+    remaining = len(config_files)
+    try:
+        with ProcessPoolExecutor(max_workers=processes) as executor, \
+                open_sink(output_file, fieldnames=OUTPUT_FIELDS) as sink:
+            futures = [executor.submit(run_site, f, keywords, records, options) for f in config_files]
+            while remaining:
+                try:
+                    kind, site, payload = records.get(timeout=5)
+                except queue.Empty:
+                    # Safety net: a worker process killed outright never reports back
+                    if all(f.done() for f in futures):
+                        print(f"{remaining} site workers exited without reporting")
+                        break
+                    continue
+                if kind == "record":
+                    payload["No"] = sink.rows + 1
+                    payload["Site"] = site
+                    sink.write(payload)
+                    if stored is not None:
+                        stored.write(payload)
+                elif kind == "done":
+                    remaining -= 1
+                    print(f"Site {site} done: {payload} articles ({remaining} sites still running)")
+                else:
+                    remaining -= 1
+                    print(f"Site {site} failed: {payload}")
+    finally:
+        # Also on a worker error or Ctrl-C: commit the last batch and close the store
+        if stored is not None:
+            stored.close()
+            stored.store.close()
+
+    print(f"{sink.rows} articles from {len(config_files)} sites saved to {output_file}")
+    if stored is not None:
+        print(f"Store: {stored.summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401 -- only needed as a BeautifulSoup backend
+    HAVE_LXML = True
+except ImportError:
+    HAVE_LXML = False
+
+
+def declared_charset(response):
+    """Charset from the Content-Type header, or None when the server didn't declare one"""
+    return content_type_charset(response.headers.get("Content-Type", ""))
+
+
+def content_type_charset(content_type):
+    """The charset parameter of a Content-Type value, or None"""
+    for param in content_type.split(";")[1:]:
+        key, _, value = param.strip().partition("=")
+        if key.lower() == "charset":
+            return value.strip("\"' ") or None
+    return None
+
+
+class PageParser:
+    """
+    Turns a response into a BeautifulSoup tree.
+    Pages are decoded from the raw bytes using the charset declared in the Content-Type
+    header (or the page's <meta charset>), rather than response.text's guessing. With
+    `tags` given, only those elements and their descendants are built, which skips
+    most of the navigation, scripts and ads on a news page.
+    """
+
+    def __init__(self, parser="lxml", tags=None):
+        if parser == "lxml" and not HAVE_LXML:
+            print("lxml is not installed; falling back to the slower html.parser")
+            parser = "html.parser"
+        self.parser = parser
+        self.tags = sorted(tags) if tags else None
+        self.strainer = SoupStrainer(self.tags) if self.tags else None
+
+    def parse(self, response):
+        return self.parse_bytes(response.content, declared_charset(response))
+
+    def parse_bytes(self, content, encoding=None):
+        return BeautifulSoup(content, self.parser, parse_only=self.strainer, from_encoding=encoding)
+
+
+def page_parser(config, tags=None):
+    """
+    PageParser for a site config's `parsing` block:
+      parser: lxml | html.parser   (default html.parser)
+      scoped: true                 (only build `tags`, e.g. a SelectorPlan's tag_names)
+    """
+    options = config.get("parsing") or {}
+    scoped = tags if options.get("scoped") else None
+    return PageParser(options.get("parser", "html.parser"), tags=scoped)
@@ -0,0 +1,94 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at `rate` tokens per second, holding at most `burst`.
+    Callers reserve a token under the lock and sleep outside it; the bucket is allowed
+    to go into debt, so concurrent callers are spaced exactly 1/rate apart instead of
+    racing for the next refill.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = max(1, burst)
+        self.acquired = 0
+        self.waited = 0.0
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take one token and return how many seconds the caller must wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.acquired += 1
+            self.waited += wait
+            return wait
+
+    def refund(self):
+        """Give back a reserved token that wasn't used"""
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + 1)
+            self.acquired -= 1
+
+    def acquire(self, stop=None):
+        """
+        Wait for a token. With a `stop` event, the wait ends early once it is set: the
+        token is given back and False returned, so a request that won't be sent
+        doesn't delay the ones that will.
+        """
+        wait = self.reserve()
+        if stop is None:
+            if wait > 0:
+                time.sleep(wait)
+            return True
+        if stop.wait(wait) if wait > 0 else stop.is_set():
+            self.refund()
+            return False
+        return True
+
+
+class DomainRateLimiter:
+    """One token bucket per host; hosts without an explicit rate get the default"""
+
+    def __init__(self, default_rate=1.0, default_burst=1):
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        self._rates = {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def configure(self, host, rate, burst=1):
+        """Set the rate for a host; a rate of None or 0 disables limiting for it"""
+        with self._lock:
+            self._rates[host] = (rate, burst)
+            self._buckets.pop(host, None)
+
+    def bucket(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._buckets:
+                rate, burst = self._rates.get(host, (self.default_rate, self.default_burst))
+                self._buckets[host] = TokenBucket(rate, burst) if rate else None
+            return self._buckets[host]
+
+    def acquire(self, url, stop=None):
+        """Block until a request to the host of url is allowed; False if `stop` was set first"""
+        bucket = self.bucket(url)
+        if bucket is not None:
+            return bucket.acquire(stop)
+        return stop is None or not stop.is_set()
+
+    def stats(self):
+        """Requests admitted and total seconds spent waiting, per host"""
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {host: {"requests": b.acquired, "waited": round(b.waited, 2), "rate": b.rate}
+                for host, b in buckets.items() if b is not None}
@@ -0,0 +1,91 @@
+"""
+Re-run article extraction over the raw HTML archive, without the network.
+
+After fixing a site's article selectors in its config:
+    python Scrap/reextract.py --config Scrap/configs/gamek.yaml
+Every archived article page of the site's hosts (latest fetch per URL) is parsed
+again with the config's selectors on a pool of processes, and the details are
+written to one CSV.
+"""
+import argparse
+import os
+import time
+from datetime import datetime
+from multiprocessing import Pool
+
+from extraction import ArticleExtractor, empty_details
+from flexible_scraper import load_config
+from html_archive import DEFAULT_ARCHIVE_DIR, HtmlArchive, read_record
+from http_client import site_hosts
+from parsing import content_type_charset
+from sinks import CsvSink
+
+OUTPUT_FIELDS = ["No", "Date", "Title_detail", "Summary_detail", "Content", "Link", "Fetched"]
+
+# Set in each worker process by init_worker
+_extractor = None
+
+
+def init_worker(config):
+    global _extractor
+    _extractor = ArticleExtractor(config)
+
+
+def extract_entry(entry):
+    """Read one archived page and extract its details (runs in a worker process)"""
+    url, fetched_at, path, offset, length = entry
+    try:
+        record = read_record(path, offset, length)
+        encoding = content_type_charset(record["headers"].get("Content-Type", ""))
+        details = _extractor.extract_bytes(record["body"], encoding)
+    except Exception as e:
+        print(f"Error re-extracting {url}: {e}")
+        details = empty_details()
+    details["Link"] = url
+    details["Fetched"] = datetime.fromtimestamp(fetched_at).strftime("%Y-%m-%d %H:%M:%S")
+    return details
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-extract article details from archived pages of a site')
+    parser.add_argument('--config', required=True, help='Site config whose article selectors are applied')
+    parser.add_argument('--archive-dir', default=DEFAULT_ARCHIVE_DIR, help='Directory of the raw HTML archive')
+    parser.add_argument('--output-dir', default='output', help='Output directory for the CSV')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help='Parser processes')
+    parser.add_argument('--all-fetches', action='store_true',
+                        help='Extract every archived fetch of a URL, not only the latest')
+    parser.add_argument('--limit', type=int, help='Only the first N pages (to try out a selector)')
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    site = config.get('site_name', 'site')
+    archive = HtmlArchive(args.archive_dir)
+    entries = archive.entries(hosts=site_hosts(config), kind="article", latest=not args.all_fetches)
+    archive.close()
+    if args.limit:
+        entries = entries[:args.limit]
+    if not entries:
+        print(f"No archived article pages for {site} in {args.archive_dir}")
+        return
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    csv_file = os.path.join(args.output_dir, f"{site}_reextract_{timestamp}.csv")
+
+    print(f"Re-extracting {len(entries)} pages of {site} with {args.processes} processes")
+    start = time.perf_counter()
+    empty = 0
+    with Pool(args.processes, initializer=init_worker, initargs=(config,)) as pool, \
+            CsvSink(csv_file, fieldnames=OUTPUT_FIELDS) as sink:
+        for details in pool.imap(extract_entry, entries, chunksize=16):
+            details["No"] = sink.rows + 1
+            if not details["Content"]:
+                empty += 1
+            sink.write(details)
+    elapsed = time.perf_counter() - start
+    print(f"{sink.rows} pages re-extracted in {elapsed:.1f}s ({sink.rows / elapsed:.0f} pages/s), "
+          f"{empty} without content, saved to {csv_file}")
+
+
+if __name__ == "__main__":
+    main()
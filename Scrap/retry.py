@@ -0,0 +1,153 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+
+# Failures worth another attempt: the request may well succeed a moment later
+RETRY_EXCEPTIONS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of sending a request while the breaker of its host is open"""
+
+
+def retry_after_seconds(response):
+    """Delay asked for by a Retry-After header (seconds or an HTTP date), or None"""
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    How a host's failed requests are retried: up to `retries` more attempts after
+    connection errors, timeouts and the `statuses` responses, waiting a random time
+    between 0 and backoff * 2**attempt (capped at max_backoff). A 429/503 with
+    Retry-After waits as long as the server asks, up to max_retry_after.
+    """
+
+    def __init__(self, retries=3, backoff=0.5, max_backoff=30, statuses=(429, 500, 502, 503, 504),
+                 max_retry_after=120):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = set(statuses)
+        self.max_retry_after = max_retry_after
+
+    def should_retry(self, response):
+        return response.status_code in self.statuses
+
+    def delay(self, attempt, response=None):
+        """Seconds to wait before retry number attempt + 1"""
+        if response is not None and response.status_code in (429, 503):
+            asked = retry_after_seconds(response)
+            if asked is not None:
+                return min(asked, self.max_retry_after)
+        # Full jitter keeps retrying workers from hitting the host in lockstep
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to a host after `failures` consecutive failures. While
+    open, requests fail at once with CircuitOpenError; after `reset_after` seconds
+    one trial request is let through, and its outcome closes or reopens the breaker.
+    """
+
+    def __init__(self, failures=5, reset_after=60):
+        self.failures = failures
+        self.reset_after = reset_after
+        self.trips = 0
+        self.rejected = 0
+        self._consecutive = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def before_request(self, host=""):
+        """
+        Raise CircuitOpenError unless a request may be sent now; returns True if the
+        request is the half-open trial
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            if time.monotonic() - self._opened_at >= self.reset_after and not self._trial_running:
+                self._trial_running = True
+                return True
+            self.rejected += 1
+            remaining = max(0.0, self.reset_after - (time.monotonic() - self._opened_at))
+        raise CircuitOpenError(f"Circuit open for {host}: too many failures, retrying in {remaining:.0f} s")
+
+    def record_success(self):
+        with self._lock:
+            self._consecutive = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def cancel_trial(self):
+        """The trial request was never sent: let the next request be the trial instead"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        """Count a failure; returns True if it opened the breaker"""
+        with self._lock:
+            self._consecutive += 1
+            if self._trial_running or (self._opened_at is None and self._consecutive >= self.failures):
+                tripped = self._opened_at is None
+                self._opened_at = time.monotonic()
+                self._trial_running = False
+                if tripped:
+                    self.trips += 1
+                return tripped
+            return False
+
+
+class HostBreakers:
+    """One circuit breaker per host, with per-host settings like DomainRateLimiter"""
+
+    def __init__(self, **defaults):
+        self.defaults = defaults
+        self._settings = {}
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def configure(self, host, **settings):
+        with self._lock:
+            self._settings[host] = settings
+            self._breakers.pop(host, None)
+
+    def breaker(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._breakers:
+                settings = dict(self.defaults)
+                settings.update(self._settings.get(host, {}))
+                self._breakers[host] = CircuitBreaker(**settings)
+            return self._breakers[host]
+
+    def stats(self):
+        """Trips and rejected requests per host, for hosts whose breaker ever opened"""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {host: {"trips": b.trips, "rejected": b.rejected, "open": b.is_open}
+                for host, b in breakers.items() if b.trips}
@@ -1,9 +1,13 @@
 import requests
+import http_client
 import os
-from bs4 import BeautifulSoup
-import csv
-import time
 from datetime import datetime
+from flexible_scraper import load_config
+from parsing import page_parser
+from article_store import ArticleStore, StoreSink
+from sinks import CsvSink
+from concurrency import prefetch_pages
+from contextlib import closing
 
 # 1. List of keywords to search for
 keywords = [
@@ -24,6 +28,17 @@ headers = {
     )
 }
 
+# Per-site politeness (rate limit) and connection settings live in the shared YAML config
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "configs", "cafef.yaml")
+CONFIG = load_config(CONFIG_FILE)
+http_client.get_client().configure_site(CONFIG)
+
+# HTML parser backend from the config's `parsing` block
+PARSER = page_parser(CONFIG)
+
+# Number of search result pages requested ahead of the one being parsed
+SEARCH_PREFETCH = (CONFIG.get("concurrency") or {}).get("search_prefetch", 1)
+
 def get_search_results_page(keyword, page=1):
     """
     Given a keyword, perform a search on Cafef and return a list of articles (with title, summary, link)
@@ -32,12 +47,12 @@ def get_search_results_page(keyword, page=1):
     # Construct the search URL with the page parameter.
     search_url = f"https://cafef.vn/tim-kiem.chn?keywords={keyword}&page={page}"
     try:
-        response = requests.get(search_url, headers=headers, timeout=10)
+        response = http_client.get(search_url, kind="search", headers=headers, timeout=10)
     except requests.exceptions.RequestException as e:
         print(f"Error fetching search results for keyword '{keyword}' on page {page}: {e}")
         return []  # Return an empty list if there's an error
 
-    soup = BeautifulSoup(response.text, "html.parser")
+    soup = PARSER.parse(response)
     articles = soup.find_all("div", class_="item")
     
     results = []
@@ -65,20 +80,30 @@ def get_search_results_page(keyword, page=1):
     
     return results
 
-def get_all_search_results(keyword, max_pages=10):
+def get_all_search_results(keyword, max_pages=10, seen=None):
     """
     Fetch search results for a given keyword across multiple pages.
-    Loops from page 1 to max_pages or until no more articles are found.
+    Loops from page 1 to max_pages or until no more articles are found, or until a page
+    only holds links already in `seen` (found by earlier keywords) or on earlier pages.
     """
+    seen = seen if seen is not None else set()
     all_results = []
-    for page in range(1, max_pages + 1):
-        print(f"Getting page {page} for keyword '{keyword}'...")
-        page_results = get_search_results_page(keyword, page=page)
-        if not page_results:
-            print(f"No results found on page {page} for keyword '{keyword}'. Stopping.")
-            break  # No more results on further pages
-        all_results.extend(page_results)
-        time.sleep(1)  # Polite delay between page requests
+    keyword_links = set()
+    # Later pages are requested speculatively (SEARCH_PREFETCH at a time) while
+    # earlier ones are parsed; leaving the loop cancels the ones still pending
+    pages = prefetch_pages(lambda page: get_search_results_page(keyword, page=page),
+                           max_pages, window=SEARCH_PREFETCH)
+    with closing(pages):
+        for page, page_results in pages:
+            print(f"Got page {page} for keyword '{keyword}'")
+            if not page_results:
+                print(f"No results found on page {page} for keyword '{keyword}'. Stopping.")
+                break  # No more results on further pages
+            all_results.extend(page_results)
+            if all(r["Link"] in seen or r["Link"] in keyword_links for r in page_results):
+                print(f"Page {page} for keyword '{keyword}' only has already-seen links. Stopping.")
+                break  # Later pages are very unlikely to hold anything new
+            keyword_links.update(r["Link"] for r in page_results)
     return all_results
 
 def get_article_details(url):
@@ -90,12 +115,12 @@ def get_article_details(url):
     - Content (from <div class="contentdetail">)
     """
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
     except requests.exceptions.RequestException as e:
         print(f"Error fetching article details from {url}: {e}")
         return {"Date": "", "Title": "", "Summary": "", "Content": ""}
     
-    soup = BeautifulSoup(response.text, "html.parser")
+    soup = PARSER.parse(response)
     
     # Extract title from <h1>
     title_tag = soup.find("h1")
@@ -124,40 +149,51 @@ def crawl_cafef(keywords):
     """
     Orchestrates the crawling process for Cafef:
     1. For each keyword, fetch all search results across multiple pages.
-    2. For each search result, fetch detailed article data.
+    2. For each unique search result, fetch detailed article data.
     3. Return a consolidated list of all articles.
     """
-    all_articles = []
-    count = 1
-    
+    # Search every keyword first and merge the hits by link, so each article is
+    # fetched once and tagged with every keyword that matched it
+    found = {}
     for keyword in keywords:
         print(f"Searching for keyword: {keyword}")
-        # Get all search results for the keyword (across multiple pages)
-        search_results = get_all_search_results(keyword, max_pages=10)
-        
-        # For each result, fetch the full article details
-        for result in search_results:
+        for result in get_all_search_results(keyword, max_pages=10, seen=found):
             url = result["Link"]
             if not url:
                 continue
-            
-            article_details = get_article_details(url)
-            article_data = {
-                "No": count,
-                "Date": article_details["Date"],
-                "Title": article_details["Title"] or result["Title"],
-                "Summary": article_details["Summary"] or result["Summary"],
-                "Content": article_details["Content"],
-                "Link": url
-            }
-            all_articles.append(article_data)
-            count += 1
-            time.sleep(1)  # Polite delay between article requests
+            if url in found:
+                if keyword not in found[url]["Keywords"]:
+                    found[url]["Keywords"].append(keyword)
+            else:
+                result["Keywords"] = [keyword]
+                found[url] = result
+    print(f"Unique articles across all keywords: {len(found)}")
+
+    count = 1
     
-    return all_articles
+    # For each unique result, fetch the full article details
+    for result in found.values():
+        url = result["Link"]
+        article_details = get_article_details(url)
+        article_data = {
+            "No": count,
+            "Date": article_details["Date"],
+            "Title": article_details["Title"] or result["Title"],
+            "Summary": article_details["Summary"] or result["Summary"],
+            "Content": article_details["Content"],
+            "Link": url,
+            "Keywords": "; ".join(result["Keywords"])
+        }
+        yield article_data
+        count += 1
 
 if __name__ == "__main__":
-    # Run the crawler for all keywords
+    # Reuse pages from earlier runs where they are still fresh
+    http_client.get_client().enable_cache()
+    # Keep the raw pages so selectors can be fixed and re-run offline (reextract.py)
+    http_client.get_client().enable_archive()
+
+    # The crawler is a generator; articles are fetched as the loop below consumes them
     articles = crawl_cafef(keywords)
 
     output_dir = r"D:\Data\vietnews\output"
@@ -167,12 +203,14 @@ if __name__ == "__main__":
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     csv_file = os.path.join(output_dir, f"cafef_news_{timestamp}.csv")
     
-    # Write the results to a CSV file with UTF-8 BOM encoding for Excel compatibility
-    with open(csv_file, mode="w", newline="", encoding="utf-8-sig") as f:
-        writer = csv.DictWriter(f, fieldnames=["No", "Date", "Title", "Summary", "Content", "Link"])
-        writer.writeheader()
+    # Stream each article to the CSV (UTF-8 BOM for Excel) as soon as it is crawled,
+    # and upsert it into the article store (duplicates of earlier runs are merged)
+    with CsvSink(csv_file) as sink, StoreSink(ArticleStore(), site="cafef") as stored:
         for art in articles:
-            writer.writerow(art)
+            sink.write(art)
+            stored.write(art)
     
     print(f"Data saved to {csv_file}")
+    print(f"Store: {stored.summary()}")
+    http_client.get_client().report()
     print("Crawling completed successfully.")
\ No newline at end of file
@@ -1,10 +1,21 @@
 import os
-import csv
+import json
 import time
+import queue
+import threading
 import requests
+import http_client
+from concurrent.futures import ThreadPoolExecutor
+from concurrency import ordered_map
+from driver_pool import DriverPool
+from flexible_scraper import load_config
+from parsing import page_parser
+from article_store import ArticleStore, StoreSink
+from sinks import CsvSink
 from datetime import datetime
 from bs4 import BeautifulSoup
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.chrome.service import Service
@@ -22,210 +33,458 @@ keywords = [
     "thiết kế game"
 ]
 
-def init_browser():
-    service = Service(ChromeDriverManager().install())
+# Article politeness and browser pool settings live in the shared YAML config
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "configs", "tinhte.yaml")
+CONFIG = load_config(CONFIG_FILE)
+http_client.get_client().configure_site(CONFIG)
+
+SELENIUM = CONFIG.get("selenium") or {}
+CONCURRENCY = CONFIG.get("concurrency") or {}
+
+# HTML parser backend for article pages, from the config's `parsing` block
+PARSER = page_parser(CONFIG)
+
+# Requests a lean browser never makes: images, media, fonts, ads and analytics.
+# Google CSE itself (cse.google.com, www.google.com/cse) must stay reachable.
+BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3", "*.woff", "*.woff2", "*.ttf",
+    "*doubleclick.net*", "*googlesyndication.com*", "*googletagmanager.com*",
+    "*google-analytics.com*", "*adservice.google.*", "*facebook.net*", "*connect.facebook.*",
+]
+
+# Resolved chromedriver path, so later runs don't ask webdriver-manager (and the network)
+DRIVER_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".driver_cache.json")
+_driver_lock = threading.Lock()
+
+def chromedriver_path():
+    """
+    Path of the chromedriver binary. selenium.driver_path in the config wins;
+    otherwise webdriver-manager installs selenium.driver_version (or the latest
+    version, pinned from then on) once and the path is reused on later runs.
+    """
+    if SELENIUM.get("driver_path"):
+        return SELENIUM["driver_path"]
+    version = SELENIUM.get("driver_version")
+    with _driver_lock:
+        try:
+            with open(DRIVER_CACHE_FILE, encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            cached = {}
+        if (version is None or cached.get("version") == version) and os.path.exists(cached.get("path", "")):
+            return cached["path"]
+        path = ChromeDriverManager(driver_version=version).install()
+        with open(DRIVER_CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump({"version": version, "path": path}, f)
+        return path
+
+def init_browser(headless=True, lean=True):
+    """
+    Start Chrome. In lean mode pages load eagerly (DOM ready, without waiting for
+    every subresource), images are never downloaded, and BLOCKED_URLS plus any
+    selenium.blocked_urls from the config are refused at the network layer.
+    """
+    service = Service(chromedriver_path())
     options = webdriver.ChromeOptions()
-    # options.add_argument("--headless")
-    return webdriver.Chrome(service=service, options=options)
+    if headless:
+        options.add_argument("--headless=new")
+        options.add_argument("--disable-dev-shm-usage")
+    if lean:
+        options.page_load_strategy = "eager"
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_argument("--mute-audio")
+    driver = webdriver.Chrome(service=service, options=options)
+    if lean:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs",
+                               {"urls": BLOCKED_URLS + SELENIUM.get("blocked_urls", [])})
+    return driver
+
+# Bytes transferred for the document and every subresource so far, and the JS heap in use
+_PAGE_METRICS_JS = """
+const entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+return {
+    bytes: entries.reduce((total, e) => total + (e.transferSize || 0), 0),
+    heap: performance.memory ? performance.memory.usedJSHeapSize : 0
+};
+"""
+
+def page_metrics(driver):
+    return driver.execute_script(_PAGE_METRICS_JS)
+
+def summarize_search_stats(stats):
+    """A few lines summing up the page load metrics and wait steps of a crawl"""
+    metrics = stats["page_metrics"]
+    if not metrics:
+        return "Search pages: none loaded"
+    seconds = sum(m["seconds"] for m in metrics) / len(metrics)
+    kilobytes = sum(m["bytes"] for m in metrics) / len(metrics) / 1024
+    heap = max(m["heap"] for m in metrics) / 1024 / 1024
+    lines = [f"Search pages: {len(metrics)} loaded, {seconds:.2f} s and {kilobytes:.0f} KB per page on average, "
+             f"peak JS heap {heap:.0f} MB"]
+    waits = ", ".join(f"{name} {sum(times) / len(times):.2f} s" for name, times in stats["steps"].items())
+    lines.append(f"Average wait per step: {waits}")
+    if stats["timeouts"]:
+        lines.append(f"Timed out steps: {', '.join(stats['timeouts'])}")
+    return "\n".join(lines)
+
+# Per-step wait limits in seconds (selenium.timeouts in the config overrides them)
+TIMEOUTS = {"load": 15, "results": 10, "page_change": 10, "settle": 3}
+TIMEOUTS.update(SELENIUM.get("timeouts") or {})
+# The results count as rendered once the overlay has gone this long without DOM mutations
+QUIET_MS = SELENIUM.get("quiet_ms", 200)
+
+# Counts DOM mutations under the CSE widget, so waits can tell when rendering has stopped
+_OBSERVE_RESULTS_JS = """
+const root = document.querySelector('div.gsc-control-cse') || document.body;
+if (window.__gscObserver) window.__gscObserver.disconnect();
+window.__gscMutations = 0;
+window.__gscLastMutation = performance.now();
+window.__gscObserver = new MutationObserver(records => {
+    window.__gscMutations += records.length;
+    window.__gscLastMutation = performance.now();
+});
+window.__gscObserver.observe(root, {childList: true, subtree: true, characterData: true});
+"""
+_QUIET_FOR_JS = "return performance.now() - (window.__gscLastMutation || 0);"
+
+def results_ready(driver):
+    """Results, or CSE's explicit "no results" message, have been rendered"""
+    return bool(driver.find_elements(By.CSS_SELECTOR, "div.gsc-webResult")
+                or driver.find_elements(By.CSS_SELECTOR, "div.gs-no-results-result"))
+
+def results_settled(driver):
+    """No DOM mutation in the CSE widget for QUIET_MS"""
+    return driver.execute_script(_QUIET_FOR_JS) >= QUIET_MS
+
+def current_cursor_page(driver):
+    pages = driver.find_elements(By.CSS_SELECTOR, ".gsc-cursor-current-page")
+    return pages[0].text if pages else None
 
-def get_tinhte_search_results(driver, keyword, max_pages=10):
+def page_changed(first_result, cursor_page):
+    """Condition: the previous first result was replaced, or the cursor moved to another page"""
+    def condition(driver):
+        if EC.staleness_of(first_result)(driver):
+            return True
+        current = current_cursor_page(driver)
+        return current is not None and current != cursor_page
+    return condition
+
+def timed_wait(driver, step, condition, *timings):
+    """WebDriverWait for one step, appending how long it took to timings[...][step]"""
+    started = time.perf_counter()
+    try:
+        return WebDriverWait(driver, TIMEOUTS[step], poll_frequency=0.05).until(condition)
+    finally:
+        for steps in timings:
+            steps.setdefault(step, []).append(time.perf_counter() - started)
+
+def get_tinhte_search_results(driver, keyword, max_pages=10, stats=None):
     """
     Search Tinhte.vn via the embedded Google CSE overlay, paginate up to max_pages,
     and return a list of {Title_search, Summary_search, Link}.
+    Every step waits on an explicit condition (page loaded, results rendered, result
+    set replaced after a click, DOM quiet) with its own timeout instead of sleeping.
+    If given, stats["pages"] is set to the number of result pages read,
+    stats["page_metrics"] to each page's load time, bytes transferred and JS heap,
+    stats["steps"] to the time spent in each wait step and stats["timeouts"] to the
+    steps that timed out.
     """
+    stats = stats if stats is not None else {}
+    stats["pages"] = 0
+    stats["page_metrics"] = []
+    stats["steps"] = {}
+    stats["timeouts"] = []
     results = []
+    step = "load"
     try:
+        page_started = time.perf_counter()
         driver.get("https://tinhte.vn/")
-        wait = WebDriverWait(driver, 10)
-        wait.until(EC.presence_of_element_located((By.ID, "gsc-i-id1")))
+        # The default buffer of 250 entries would stop counting bytes part-way through
+        driver.execute_script("performance.setResourceTimingBufferSize(10000);")
+        bytes_so_far = 0
+        page_steps = {}
+        inp = timed_wait(driver, "load", EC.presence_of_element_located((By.ID, "gsc-i-id1")),
+                         stats["steps"], page_steps)
+        driver.execute_script(_OBSERVE_RESULTS_JS)
 
         # 1) Enter keyword into the Google CSE input
-        inp = driver.find_element(By.ID, "gsc-i-id1")
         inp.clear()
         inp.send_keys(keyword, Keys.RETURN)
 
-        # 2) Wait for results overlay
-        wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, "div.gsc-results-wrapper-visible")))
-        time.sleep(2)  # Initial wait for results
+        # 2) Wait for the results overlay to render
+        step = "results"
+        timed_wait(driver, "results", results_ready, stats["steps"], page_steps)
 
-        page_count = 0
         seen_links = set()  # To avoid duplicates
 
-        while page_count < max_pages:
+        while stats["pages"] < max_pages:
+            # Let the overlay finish rendering; a page that never goes quiet is still read
             try:
-                # Wait for results to load
-                wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.gsc-webResult")))
-                time.sleep(2)  # Wait for dynamic content
-
-                soup = BeautifulSoup(driver.page_source, "html.parser")
-                items = soup.select("div.gsc-webResult")
-                
-                if not items:
-                    print(f"No more results found for {keyword} after page {page_count}")
-                    break
+                step = "settle"
+                timed_wait(driver, "settle", results_settled, stats["steps"], page_steps)
+            except TimeoutException:
+                stats["timeouts"].append("settle")
+                print(f"Results for {keyword} still changing after {TIMEOUTS['settle']} s; reading them anyway")
 
-                new_items_found = False
-                for it in items:
-                    title_el = it.select_one(".gs-title a")
-                    snippet_el = it.select_one("div.gsc-thumbnail-inside")
-                    
-                    if not title_el:
-                        continue
-                        
-                    link = title_el.get("href", "")
-                    if not link or link in seen_links:
-                        continue
-                        
-                    seen_links.add(link)
-                    new_items_found = True
-                    
-                    results.append({
-                        "Title_search": title_el.get_text(strip=True),
-                        "Summary_search": snippet_el.get_text(strip=True) if snippet_el else "",
-                        "Link": link
-                    })
+            wrapper = driver.find_elements(By.CSS_SELECTOR, "div.gsc-results-wrapper-visible")
+            html = wrapper[0].get_attribute("outerHTML") if wrapper else driver.page_source
+            items = BeautifulSoup(html, "html.parser").select("div.gsc-webResult")
+            stats["pages"] += 1
 
-                if not new_items_found:
-                    print(f"No new items found for {keyword} after page {page_count}")
-                    break
+            metrics = page_metrics(driver)
+            stats["page_metrics"].append({
+                "seconds": time.perf_counter() - page_started,
+                "bytes": metrics["bytes"] - bytes_so_far,
+                "heap": metrics["heap"],
+            })
+            bytes_so_far = metrics["bytes"]
+            last = stats["page_metrics"][-1]
+            waits = ", ".join(f"{name} {sum(times):.2f} s" for name, times in page_steps.items())
+            print(f"Page {stats['pages']} for {keyword}: {last['seconds']:.2f} s ({waits}), "
+                  f"{last['bytes'] / 1024:.0f} KB, JS heap {last['heap'] / 1024 / 1024:.0f} MB")
 
-                # Try to find and click the next button
-                try:
-                    # Wait for pagination to be present
-                    wait.until(EC.presence_of_element_located((By.CLASS_NAME, "gsc-cursor")))
-                    
-                    # Find all page numbers
-                    page_numbers = driver.find_elements(By.CLASS_NAME, "gsc-cursor-page")
-                    
-                    # Current page is usually marked with a specific class
-                    current_page = next((p for p in page_numbers if 'gsc-cursor-current-page' in p.get_attribute("class")), None)
-                    
-                    if current_page:
-                        current_index = page_numbers.index(current_page)
-                        if current_index + 1 < len(page_numbers):
-                            # Click the next page number
-                            next_page = page_numbers[current_index + 1]
-                            driver.execute_script("arguments[0].click();", next_page)
-                            time.sleep(2)  # Wait for new results to load
-                            page_count += 1
-                            print(f"Moved to page {page_count + 1} for {keyword}")
-                            continue
-                
-                    # If we couldn't find the next page, try the next button
-                    next_button = driver.find_element(By.CSS_SELECTOR, ".gsc-cursor-next-page")
-                    if next_button:
-                        driver.execute_script("arguments[0].click();", next_button)
-                        time.sleep(2)
-                        page_count += 1
-                        print(f"Moved to next page for {keyword} using next button")
-                        continue
-                        
-                except Exception as e:
-                    print(f"No more pages available for {keyword} after page {page_count}")
-                    break
-                    
-            except Exception as e:
-                print(f"Error on page {page_count} for {keyword}: {str(e)}")
+            if not items:
+                print(f"No more results found for {keyword} after page {stats['pages']}")
                 break
 
+            new_items_found = False
+            for it in items:
+                title_el = it.select_one(".gs-title a")
+                snippet_el = it.select_one("div.gsc-thumbnail-inside")
+
+                if not title_el:
+                    continue
+
+                link = title_el.get("href", "")
+                if not link or link in seen_links:
+                    continue
+
+                seen_links.add(link)
+                new_items_found = True
+
+                results.append({
+                    "Title_search": title_el.get_text(strip=True),
+                    "Summary_search": snippet_el.get_text(strip=True) if snippet_el else "",
+                    "Link": link
+                })
+
+            if not new_items_found:
+                print(f"No new items found for {keyword} after page {stats['pages']}")
+                break
+
+            # 3) Move to the next page: the cursor entry after the current one, else the next button
+            cursor_page = current_cursor_page(driver)
+            page_numbers = driver.find_elements(By.CLASS_NAME, "gsc-cursor-page")
+            current = next((p for p in page_numbers if 'gsc-cursor-current-page' in p.get_attribute("class")), None)
+            next_page = None
+            if current is not None and page_numbers.index(current) + 1 < len(page_numbers):
+                next_page = page_numbers[page_numbers.index(current) + 1]
+            else:
+                next_page = next(iter(driver.find_elements(By.CSS_SELECTOR, ".gsc-cursor-next-page")), None)
+            if next_page is None:
+                print(f"No more pages available for {keyword} after page {stats['pages']}")
+                break
+
+            first_result = driver.find_element(By.CSS_SELECTOR, "div.gsc-webResult")
+            page_started = time.perf_counter()
+            page_steps = {}
+            driver.execute_script("arguments[0].click();", next_page)
+            step = "page_change"
+            timed_wait(driver, "page_change", page_changed(first_result, cursor_page), stats["steps"], page_steps)
+            print(f"Moved to page {stats['pages'] + 1} for {keyword}")
+
         print(f"Found {len(results)} results for {keyword}")
         return results
-        
+
+    except TimeoutException:
+        # Say so rather than quietly returning a short result list
+        stats["timeouts"].append(step)
+        print(f"Timed out after {TIMEOUTS[step]} s waiting for '{step}' on page {stats['pages'] + 1} "
+              f"for {keyword}; keeping {len(results)} results")
+        return results
     except Exception as e:
         print(f"Error in search: {str(e)}")
         return results
 
-def get_article_details(url, max_retries=3):
+def get_article_details(url):
     """
     Fetch an article via HTTP and parse title, date, and content.
-    Added retry mechanism for reliability.
+    Timeouts, connection errors and 429/5xx answers are retried by the shared client.
     """
-    for attempt in range(max_retries):
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+        "Accept-Language": "en-US,en;q=0.5",
+        "Connection": "keep-alive",
+    }
+    try:
+        r = http_client.get(url, headers=headers, timeout=15)
+        r.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching {url}: {str(e)}")
+        return {"Date": "", "Title_detail": "", "Summary_detail": "", "Content": ""}
+    
+    soup = PARSER.parse(r)
+    
+    # Try multiple selectors for each element
+    h1 = (
+        soup.find("h1", class_="thread-title") or
+        soup.find("h1", class_="title") or
+        soup.find("h1")
+    )
+    
+    tm = (
+        soup.find("time") or
+        soup.find("span", class_="thread-date") or
+        soup.find("span", class_="date")
+    )
+    
+    content_el = (
+        soup.find("article") or
+        soup.find("div", class_="messageContent") or
+        soup.find("div", class_="thread-content")
+    )
+    
+    t = h1.get_text(strip=True) if h1 else ""
+    d = tm.get_text(strip=True) if tm else ""
+    c = content_el.get_text("\n", strip=True) if content_el else ""
+    
+    return {"Date": d, "Title_detail": t, "Summary_detail": "", "Content": c}
+
+def search_keyword(pool, keyword, max_pages=10, crawl_stats=None):
+    """Run one keyword's search on a driver leased from the pool, adding its stats to crawl_stats"""
+    with pool.driver() as driver:
+        stats = {}
+        results = get_tinhte_search_results(driver, keyword, max_pages=max_pages, stats=stats)
+        pool.record_pages(driver, stats["pages"])
+    if crawl_stats is not None:
+        with crawl_stats["lock"]:
+            crawl_stats["page_metrics"].extend(stats["page_metrics"])
+            for step, times in stats["steps"].items():
+                crawl_stats["steps"].setdefault(step, []).extend(times)
+            crawl_stats["timeouts"].extend(stats["timeouts"])
+    return results
+
+def put_until(q, item, stop):
+    """Put item on a bounded queue, giving up once `stop` is set"""
+    while not stop.is_set():
         try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-                "Accept-Language": "en-US,en;q=0.5",
-                "Connection": "keep-alive",
-            }
-            r = requests.get(url, headers=headers, timeout=15)  # Increased timeout
-            r.raise_for_status()
-            
-            soup = BeautifulSoup(r.text, "html.parser")
-            
-            # Try multiple selectors for each element
-            h1 = (
-                soup.find("h1", class_="thread-title") or
-                soup.find("h1", class_="title") or
-                soup.find("h1")
-            )
-            
-            tm = (
-                soup.find("time") or
-                soup.find("span", class_="thread-date") or
-                soup.find("span", class_="date")
-            )
-            
-            content_el = (
-                soup.find("article") or
-                soup.find("div", class_="messageContent") or
-                soup.find("div", class_="thread-content")
-            )
-            
-            t = h1.get_text(strip=True) if h1 else ""
-            d = tm.get_text(strip=True) if tm else ""
-            c = content_el.get_text("\n", strip=True) if content_el else ""
-            
-            return {"Date": d, "Title_detail": t, "Summary_detail": "", "Content": c}
-            
-        except Exception as e:
-            if attempt < max_retries - 1:
-                print(f"Retry {attempt + 1} for {url}: {str(e)}")
-                time.sleep(2 * (attempt + 1))  # Exponential backoff
-                continue
-            print(f"Error fetching {url}: {str(e)}")
-            return {"Date": "", "Title_detail": "", "Summary_detail": "", "Content": ""}
+            q.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
 
 def crawl_tinhte(keywords, max_pages_per_search=10):
-    driver = init_browser()
-    all_articles = []
+    """
+    Generator yielding one record per Tinhte article as soon as it is fetched.
+    Discovery and fetching overlap: keywords are searched in parallel by a pool of
+    headless browsers (selenium.pool_size in the config), each new link goes into a
+    bounded queue, and a pool of HTTP fetchers (concurrency.max_workers) drains it
+    while the browsers move on. Links found by several keywords are fetched once.
+    Records come out in the order their articles finish.
+    """
+    pool = DriverPool(lambda: init_browser(headless=SELENIUM.get("headless", True), lean=SELENIUM.get("lean", True)),
+                      size=SELENIUM.get("pool_size", 2),
+                      max_pages=SELENIUM.get("pages_per_driver", 30))
+    fetchers = CONCURRENCY.get("max_workers", 8)
+    links = queue.Queue(maxsize=CONCURRENCY.get("queue_size", 100))
+    records = queue.Queue(maxsize=CONCURRENCY.get("queue_size", 100))
+    stop = threading.Event()
+    crawl_stats = {"page_metrics": [], "steps": {}, "timeouts": [], "lock": threading.Lock()}
+    done = object()
+
+    def discover():
+        """Producer: run the searches and queue every new link, then one end marker per fetcher"""
+        searches = ordered_map(lambda kw: search_keyword(pool, kw, max_pages=max_pages_per_search, crawl_stats=crawl_stats),
+                               keywords, max_workers=pool.size)
+        seen = set()
+        try:
+            for kw, search_results in zip(keywords, searches):
+                print(f"\nSearch finished for keyword: {kw}")
+                if not search_results:
+                    print(f"No results for {kw}")
+                for res in search_results:
+                    link = res["Link"]
+                    if not link.startswith("http"):
+                        link = "https://tinhte.vn" + link
+                    if link in seen:
+                        continue
+                    seen.add(link)
+                    if not put_until(links, (res, link), stop):
+                        return
+        finally:
+            searches.close()
+            for _ in range(fetchers):
+                put_until(links, None, stop)
+
+    def fetch():
+        """Consumer: fetch queued links until the end marker arrives"""
+        try:
+            while not stop.is_set():
+                try:
+                    item = links.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if item is None:
+                    break
+                res, link = item
+                try:
+                    details = get_article_details(link)
+                except Exception as e:
+                    # One bad page must not take a fetcher down: with none left, discovery would block on a full queue
+                    print(f"Error fetching article {link}: {e}")
+                    continue
+                title = details["Title_detail"] or res["Title_search"]
+                summary = details["Summary_detail"] or res["Summary_search"]
+                if title and (details["Content"] or summary):  # Only add if we have content
+                    put_until(records, {
+                        "Date": details["Date"],
+                        "Title": title,
+                        "Summary": summary,
+                        "Content": details["Content"],
+                        "Link": link
+                    }, stop)
+        finally:
+            put_until(records, done, stop)
+
+    executor = ThreadPoolExecutor(max_workers=fetchers + 1)
+    producer = executor.submit(discover)
+    for _ in range(fetchers):
+        executor.submit(fetch)
     idx = 1
+    finished = 0
     
-    for kw in keywords:
-        print(f"\nSearching for keyword: {kw}")
-        search_results = get_tinhte_search_results(driver, kw, max_pages=max_pages_per_search)
-        
-        if not search_results:
-            print(f"No results for {kw}")
-            continue
-            
-        for res in search_results:
-            link = res["Link"]
-            if not link.startswith("http"):
-                link = "https://tinhte.vn" + link
-                
-            details = get_article_details(link)
-            title = details["Title_detail"] or res["Title_search"]
-            summary = details["Summary_detail"] or res["Summary_search"]
-            
-            if title and (details["Content"] or summary):  # Only add if we have content
-                all_articles.append({
-                    "No": idx,
-                    "Date": details["Date"],
-                    "Title": title,
-                    "Summary": summary,
-                    "Content": details["Content"],
-                    "Link": link
-                })
-                idx += 1
-                print(f"Added article {idx-1}: {title[:50]}...")
-            
-            time.sleep(1)
-    
-    driver.quit()
-    return all_articles
+    try:
+        while finished < fetchers:
+            record = records.get()
+            if record is done:
+                finished += 1
+                continue
+            yield {"No": idx, **record}
+            idx += 1
+            print(f"Added article {idx-1}: {record['Title'][:50]}...")
+        # No fetcher is left to drain the link queue, so release discovery if it is still putting
+        stop.set()
+        # Surface a failed discovery (e.g. Chrome could not start) instead of ending quietly
+        producer.result()
+    finally:
+        # Also runs if the consumer stops early or the crawl is interrupted
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        pool.close()
+        print(f"Browser pool: {pool.stats()}")
+        print(summarize_search_stats(crawl_stats))
 
 if __name__ == "__main__":
+    # Reuse article pages from earlier runs where they are still fresh
+    http_client.get_client().enable_cache()
+    # Keep the raw pages so selectors can be fixed and re-run offline (reextract.py)
+    http_client.get_client().enable_archive()
+
     articles = crawl_tinhte(keywords, max_pages_per_search=10)
     
     out_dir = r"D:\Data\vietnews\output"
@@ -233,10 +492,14 @@ if __name__ == "__main__":
     stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     path = os.path.join(out_dir, f"tinhte_{stamp}.csv")
     
-    with open(path, "w", newline="", encoding="utf-8-sig") as f:
-        w = csv.DictWriter(f, fieldnames=["No", "Date", "Title", "Summary", "Content", "Link"])
-        w.writeheader()
+    # Stream each article to the CSV as soon as it is crawled,
+    # and upsert it into the article store (duplicates of earlier runs are merged)
+    with CsvSink(path, fieldnames=["No", "Date", "Title", "Summary", "Content", "Link"]) as sink, \
+            StoreSink(ArticleStore(), site="tinhte") as stored:
         for a in articles:
-            w.writerow(a)
+            sink.write(a)
+            stored.write(a)
     
-    print(f"\nSaved {len(articles)} articles to {path}")
+    print(f"\nSaved {sink.rows} articles to {path}")
+    print(f"Store: {stored.summary()}")
+    http_client.get_client().report()
@@ -1,10 +1,14 @@
 import requests
-from bs4 import BeautifulSoup
-import csv
+import http_client
 import os
-import time
 from datetime import datetime
 import json
+from flexible_scraper import load_config
+from parsing import page_parser
+from article_store import ArticleStore, StoreSink
+from sinks import CsvSink
+from concurrency import ordered_map, prefetch_pages
+from contextlib import closing
 
 # The JSON endpoint that returns article data
 API_URL = "https://viresa.org.vn/api/news"
@@ -18,6 +22,19 @@ headers = {
     )
 }
 
+# Per-site politeness (rate limit) and connection settings live in the shared YAML config
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "configs", "viresa.yaml")
+CONFIG = load_config(CONFIG_FILE)
+http_client.get_client().configure_site(CONFIG)
+
+# HTML parser backend from the config's `parsing` block
+PARSER = page_parser(CONFIG)
+
+# JSON pages and article pages fetched at the same time, and pages requested
+# ahead when the API doesn't say how many there are
+MAX_WORKERS = (CONFIG.get("concurrency") or {}).get("max_workers", 1)
+SEARCH_PREFETCH = (CONFIG.get("concurrency") or {}).get("search_prefetch", 1)
+
 # Map of category slugs to their human-readable names
 CATEGORY_SLUGS = {
     "tin-trong-nuoc": "Tin trong nước",
@@ -34,13 +51,13 @@ def get_article_content(url: str) -> dict:
     Returns a dict with 'content' and 'full_title'.
     """
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         response.raise_for_status()
     except requests.exceptions.RequestException as e:
         print(f"Error fetching article: {e}")
         return {"content": "", "full_title": ""}
 
-    soup = BeautifulSoup(response.text, "html.parser")
+    soup = PARSER.parse(response)
 
     # Collect all <p> tags with style="text-align:justify;" and join them
     content_paragraphs = soup.find_all("p", style="text-align:justify;")
@@ -52,104 +69,143 @@ def get_article_content(url: str) -> dict:
 
     return {"content": content, "full_title": full_title}
 
-def fetch_json_articles(slug: str, max_pages: int = 20) -> list:
+def parse_json_articles(items: list) -> list:
     """
-    Hits the JSON endpoint /api/news?page=&slug= to gather articles for a given category slug.
-    We'll parse the JSON for each page, then store:
+    Turn the article items of one /api/news page into the records we keep:
       - id
       - title
       - date (from 'published_at')
       - description
       - link (we'll reconstruct from category + article slug)
     """
-    all_articles = []
-    for page in range(1, max_pages + 1):
-        url = f"{API_URL}?page={page}&slug={slug}"
-        print(f"Fetching JSON page {page}: {url}")
-        try:
-            resp = requests.get(url, headers=headers, timeout=20)
-            resp.raise_for_status()
-            data = resp.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching {url}: {e}")
-            break
-        except json.JSONDecodeError as je:
-            print(f"JSON parse error: {je}")
-            break
-
-        # data should look like: {"data": [ { ...article... }, ...]}
-        articles_list = data.get("data", [])
-        if not articles_list:
-            # No more articles => break
-            break
-
-        for item in articles_list:
-            cat_data = item.get("category", {})
-            cat_slug = cat_data.get("slug", "")
-            article_slug = item.get("slug", "")
-
-            # Reconstruct the final link to the actual article page
-            # Example: https://viresa.org.vn/tin-trong-nuoc/<article-slug>
-            final_link = ""
-            if cat_slug and article_slug:
-                final_link = f"https://viresa.org.vn/{article_slug}"
-
-            # Extract date from 'published_at' (YYYY-MM-DD)
-            published_date = item.get("published_at", "")[:10]
-            description = item.get("description", "")
-
-            # Add article meta to the all_articles list
-            all_articles.append({
-                "id": item.get("id"),
-                "title": item.get("title", ""),
-                "date": published_date,
-                "description": description,
-                "link": final_link,
-            })
-
-        time.sleep(2)  # Polite delay
-
-    return all_articles
-
-def crawl_viresa_api():
+    articles = []
+    for item in items:
+        cat_data = item.get("category", {})
+        cat_slug = cat_data.get("slug", "")
+        article_slug = item.get("slug", "")
+
+        # Reconstruct the final link to the actual article page
+        # Example: https://viresa.org.vn/tin-trong-nuoc/<article-slug>
+        final_link = ""
+        if cat_slug and article_slug:
+            final_link = f"https://viresa.org.vn/{article_slug}"
+
+        # Extract date from 'published_at' (YYYY-MM-DD)
+        published_date = (item.get("published_at") or "")[:10]
+        description = item.get("description", "")
+
+        articles.append({
+            "id": item.get("id"),
+            "title": item.get("title", ""),
+            "date": published_date,
+            "description": description,
+            "link": final_link,
+        })
+    return articles
+
+def fetch_json_page(slug: str, page: int) -> tuple:
     """
-    Master function:
-      - For each category, fetch JSON articles
-      - Then parse full content from each article webpage
+    Hits the JSON endpoint /api/news?page=&slug= for one page of a category.
+    Returns (articles, last_page); last_page comes from the pagination metadata
+    ("last_page" at the top level or under "meta") and is None when the API
+    doesn't send it. A failed request counts as an empty page.
     """
-    all_data = []
-    count = 1
-
-    for slug, cat_name in CATEGORY_SLUGS.items():
-        print(f"\n=== CATEGORY: {cat_name} ===")
-        articles_json = fetch_json_articles(slug, max_pages=20)
+    url = f"{API_URL}?page={page}&slug={slug}"
+    print(f"Fetching JSON page {page}: {url}")
+    try:
+        resp = http_client.get(url, kind="search", headers=headers, timeout=20)
+        resp.raise_for_status()
+        data = resp.json()
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching {url}: {e}")
+        return [], None
+    except json.JSONDecodeError as je:
+        print(f"JSON parse error: {je}")
+        return [], None
 
-        # For each article item from JSON, fetch the HTML content if link is provided
-        for art in articles_json:
-            final_title = art["title"]
-            content = ""
+    # data should look like: {"data": [ { ...article... }, ...], "last_page": N}
+    last_page = data.get("last_page") or (data.get("meta") or {}).get("last_page")
+    return parse_json_articles(data.get("data") or []), last_page
 
-            if art["link"]:
-                detail = get_article_content(art["link"])
-                if detail["full_title"]:
-                    final_title = detail["full_title"]
-                content = detail["content"]
+def discover_articles(max_pages: int = 20):
+    """
+    Generator yielding the JSON metadata of every article in every category, with
+    duplicate ids (articles listed under several categories) dropped before any
+    HTML is fetched. Page 1 of all categories is fetched at once; where it reports
+    last_page, the remaining pages of all those categories are fetched concurrently,
+    otherwise a category is walked until its first empty page, SEARCH_PREFETCH pages ahead.
+    """
+    seen = set()
+
+    def new_articles(articles):
+        for art in articles:
+            key = art["id"] if art["id"] is not None else art["link"]
+            if key in seen:
+                continue
+            seen.add(key)
+            yield art
+
+    first_pages = ordered_map(lambda slug: fetch_json_page(slug, 1), CATEGORY_SLUGS, max_workers=len(CATEGORY_SLUGS))
+    remaining = []
+    unknown_length = []
+    for slug, (articles, last_page) in zip(CATEGORY_SLUGS, first_pages):
+        print(f"=== CATEGORY: {CATEGORY_SLUGS[slug]}: {last_page or 'unknown'} pages ===")
+        yield from new_articles(articles)
+        if not articles:
+            continue
+        if last_page:
+            remaining.extend((slug, page) for page in range(2, min(last_page, max_pages) + 1))
+        else:
+            unknown_length.append(slug)
+
+    pages = ordered_map(lambda task: fetch_json_page(*task)[0], remaining, max_workers=MAX_WORKERS)
+    for articles in pages:
+        yield from new_articles(articles)
+
+    for slug in unknown_length:
+        pages = prefetch_pages(lambda page: fetch_json_page(slug, page + 1)[0], max_pages - 1, window=SEARCH_PREFETCH)
+        with closing(pages):
+            for _, articles in pages:
+                if not articles:
+                    break
+                yield from new_articles(articles)
+
+def fetch_article(art: dict) -> tuple:
+    """(art, HTML details) for one article; articles without a link get empty details"""
+    if not art["link"]:
+        return art, {"content": "", "full_title": ""}
+    return art, get_article_content(art["link"])
+
+def crawl_viresa_api(max_pages: int = 20):
+    """
+    Master function (a generator yielding one record per article):
+      - Page through every category's JSON listing concurrently
+      - Fetch each new article's webpage on a thread pool while paging continues
+    """
+    count = 1
 
-            # Compose the final record
-            all_data.append({
-                "No": count,
-                "Date": art["date"],
-                "Title": final_title,
-                "Summary": art["description"],  # short description from JSON
-                "Content": content,             # full content from HTML
-                "Link": art["link"]
-            })
+    discovered = discover_articles(max_pages=max_pages)
+    for art, detail in ordered_map(fetch_article, discovered, max_workers=MAX_WORKERS):
+        final_title = detail["full_title"] or art["title"]
 
-            count += 1
+        # Compose the final record
+        yield {
+            "No": count,
+            "Date": art["date"],
+            "Title": final_title,
+            "Summary": art["description"],  # short description from JSON
+            "Content": detail["content"],   # full content from HTML
+            "Link": art["link"]
+        }
 
-    return all_data
+        count += 1
 
 if __name__ == "__main__":
+    # Reuse pages from earlier runs where they are still fresh
+    http_client.get_client().enable_cache()
+    # Keep the raw pages so selectors can be fixed and re-run offline (reextract.py)
+    http_client.get_client().enable_archive()
+
     articles = crawl_viresa_api()
 
     # Prepare output directory
@@ -160,11 +216,14 @@ if __name__ == "__main__":
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     csv_file = os.path.join(output_dir, f"viresa_api_{timestamp}.csv")
 
-    with open(csv_file, mode="w", newline="", encoding="utf-8-sig") as f:
-        fieldnames = ["No", "Date", "Title", "Summary", "Content", "Link"]
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
+    # Stream each record to the CSV as soon as it is crawled,
+    # and upsert it into the article store (duplicates of earlier runs are merged)
+    with CsvSink(csv_file, fieldnames=["No", "Date", "Title", "Summary", "Content", "Link"]) as sink, \
+            StoreSink(ArticleStore(), site="viresa") as stored:
         for row in articles:
-            writer.writerow(row)
+            sink.write(row)
+            stored.write(row)
 
     print(f"\nDone! Data saved to {csv_file}")
+    print(f"Store: {stored.summary()}")
+    http_client.get_client().report()
@@ -1,9 +1,13 @@
-import requests
+import http_client
 import os
-from bs4 import BeautifulSoup
-import csv
-import time
+import requests
 from datetime import datetime
+from flexible_scraper import load_config
+from parsing import page_parser
+from article_store import ArticleStore, StoreSink
+from sinks import CsvSink
+from concurrency import prefetch_pages
+from contextlib import closing
 
 # 1. List of keywords to search for
 keywords = [
@@ -24,6 +28,17 @@ headers = {
     )
 }
 
+# Per-site politeness (rate limit) and connection settings live in the shared YAML config
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "configs", "vnexpress.yaml")
+CONFIG = load_config(CONFIG_FILE)
+http_client.get_client().configure_site(CONFIG)
+
+# HTML parser backend from the config's `parsing` block
+PARSER = page_parser(CONFIG)
+
+# Number of search result pages requested ahead of the one being parsed
+SEARCH_PREFETCH = (CONFIG.get("concurrency") or {}).get("search_prefetch", 1)
+
 def get_search_results_page(keyword, page =1):
     """
     Given a keyword, perform a search on VnExpress
@@ -34,8 +49,12 @@ def get_search_results_page(keyword, page =1):
     search_url = f"https://timkiem.vnexpress.net/?q={keyword}&page={page}"
     
     # B. Request the search page
-    response = requests.get(search_url, headers=headers)
-    soup = BeautifulSoup(response.text, "html.parser")
+    try:
+        response = http_client.get(search_url, kind="search", headers=headers)
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching search results for keyword '{keyword}' on page {page}: {e}")
+        return []  # Return an empty list if there's an error
+    soup = PARSER.parse(response)
     
     # C. Find all article containers. (Adjust if the structure changes.)
     articles = soup.find_all("article")
@@ -73,17 +92,24 @@ def get_search_results_page(keyword, page =1):
     
     return results
 
-def get_all_search_results(keyword, max_pages = 10):
+def get_all_search_results(keyword, max_pages = 10, seen = None):
+    seen = seen if seen is not None else set()
     all_results = []
-    for page in range(1, max_pages + 1):
-        print(f"Getting page {page} of search results")
-        page_results = get_search_results_page(keyword, page=page)
-        if not page_results:
-            break  # No more results
-        all_results.extend(page_results)
-        
-        # Be polite: short delay between requests to avoid spamming the server
-        time.sleep(1)
+    keyword_links = set()
+    # Later pages are requested speculatively while earlier ones are parsed;
+    # leaving the loop cancels the ones still pending
+    pages = prefetch_pages(lambda page: get_search_results_page(keyword, page=page),
+                           max_pages, window=SEARCH_PREFETCH)
+    with closing(pages):
+        for page, page_results in pages:
+            print(f"Got page {page} of search results")
+            if not page_results:
+                break  # No more results
+            all_results.extend(page_results)
+            # Stop once a page only repeats links we already have
+            if all(r["Link"] in seen or r["Link"] in keyword_links for r in page_results):
+                break
+            keyword_links.update(r["Link"] for r in page_results)
     
     return all_results
 
@@ -96,8 +122,12 @@ def get_article_details(url):
     - Summary (from the article page)
     - Content (the full text content of the article)
     """
-    response = requests.get(url, headers=headers)
-    soup = BeautifulSoup(response.text, "html.parser")
+    try:
+        response = http_client.get(url, headers=headers)
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching article details from {url}: {e}")
+        return {"Date": "", "Title": "", "Summary": "", "Content": ""}
+    soup = PARSER.parse(response)
     
     # A. Extract the article title (in <h1>)
     title_tag = soup.find("h1")
@@ -132,51 +162,59 @@ def crawl_vnexpress(keywords):
     """
     Orchestrates the entire crawling process:
     1. For each keyword, get the search results.
-    2. For each search result, fetch the full article details.
+    2. For each unique search result, fetch the full article details.
     3. Return a consolidated list of all articles.
     """
-    all_articles = []
-    count = 1
-    
+    # Search every keyword first and merge the hits by link, so each article is
+    # fetched once and tagged with every keyword that matched it
+    found = {}
     for keyword in keywords:
         print(f"Searching for keyword: {keyword}")
-        
-        # 1. Get the search result list for the current keyword
-        search_results = get_all_search_results(keyword, max_pages = 10)
-        
-        # 2. For each search result, fetch more details from the article page
-        for result in search_results:
+        for result in get_all_search_results(keyword, max_pages = 10, seen = found):
             url = result["Link"]
             if not url:
-                continue  # Skip if the link is missing
+                continue
+            if url in found:
+                if keyword not in found[url]["Keywords"]:
+                    found[url]["Keywords"].append(keyword)
+            else:
+                result["Keywords"] = [keyword]
+                found[url] = result
+    print(f"Unique articles across all keywords: {len(found)}")
 
-            article_details = get_article_details(url)
-            
-            # Combine everything into one record
-            article_data = {
-                "No": count,
-                "Date": article_details["Date"],
-                # If the article page has a more accurate Title, use that.
-                # Otherwise, fall back to the Title from the search result.
-                "Title": article_details["Title"] or result["Title"],
-                
-                # Same logic for summary
-                "Summary": article_details["Summary"] or result["Summary"],
-                
-                "Content": article_details["Content"],
-                "Link": url
-            }
+    count = 1
+    
+    # For each unique search result, fetch more details from the article page
+    for result in found.values():
+        url = result["Link"]
+        article_details = get_article_details(url)
+        
+        # Combine everything into one record
+        article_data = {
+            "No": count,
+            "Date": article_details["Date"],
+            # If the article page has a more accurate Title, use that.
+            # Otherwise, fall back to the Title from the search result.
+            "Title": article_details["Title"] or result["Title"],
             
-            all_articles.append(article_data)
-            count += 1
+            # Same logic for summary
+            "Summary": article_details["Summary"] or result["Summary"],
             
-            # Be polite: short delay between requests to avoid spamming the server
-            time.sleep(1)
-    
-    return all_articles
+            "Content": article_details["Content"],
+            "Link": url,
+            "Keywords": "; ".join(result["Keywords"])
+        }
+        
+        yield article_data
+        count += 1
 
 if __name__ == "__main__":
-    # 3. Run the crawler for all keywords
+    # Reuse pages from earlier runs where they are still fresh
+    http_client.get_client().enable_cache()
+    # Keep the raw pages so selectors can be fixed and re-run offline (reextract.py)
+    http_client.get_client().enable_archive()
+
+    # 3. Run the crawler for all keywords (a generator, consumed by the writer below)
     articles = crawl_vnexpress(keywords)
     
     output_dir = "D:\Data\vietnews\output"
@@ -186,10 +224,13 @@ if __name__ == "__main__":
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     csv_file = f"vnexpress_news_{timestamp}.csv"
     
-    with open(csv_file, mode="w", newline="", encoding="utf-8-sig") as f:
-        writer = csv.DictWriter(f, fieldnames=["No", "Date", "Title", "Summary", "Content", "Link"])
-        writer.writeheader()
+    # Stream each article to the CSV as soon as it is crawled,
+    # and upsert it into the article store (duplicates of earlier runs are merged)
+    with CsvSink(csv_file) as sink, StoreSink(ArticleStore(), site="vnexpress") as stored:
         for art in articles:
-            writer.writerow(art)
+            sink.write(art)
+            stored.write(art)
     
     print(f"Data saved to {csv_file}")
+    print(f"Store: {stored.summary()}")
+    http_client.get_client().report()
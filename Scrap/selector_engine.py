@@ -0,0 +1,132 @@
+import soupsieve as sv
+
+# Keys of a selector spec that are not HTML attributes
+_SPEC_KEYS = {"tag", "class", "css", "multiple", "join", "field", "inside_title"}
+
+
+def _quote(value):
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def spec_to_css(spec):
+    """
+    CSS selector for one config spec, e.g.
+      {tag: h1, data_field: title}            -> h1[data-field="title"]
+      {tag: div, class: rightdetail_content}  -> div[class~="rightdetail_content"]
+      {tag: div, class: f1 w445}              -> div[class="f1 w445"]
+    Like find(tag, class_=...), a single class matches any one of the element's
+    classes and a multi-word class must match the whole attribute. Other keys are
+    attributes, with underscores turned into dashes; `true` only requires the
+    attribute to be present. A `css` key is used as-is.
+    """
+    if spec.get("css"):
+        return spec["css"]
+    css = spec.get("tag") or "*"
+    cls = spec.get("class")
+    if cls:
+        css += f"[class={_quote(cls)}]" if " " in cls.strip() else f"[class~={_quote(cls)}]"
+    for key, value in spec.items():
+        if key in _SPEC_KEYS or value is None:
+            continue
+        attribute = key.replace("_", "-")
+        css += f"[{attribute}]" if value is True else f"[{attribute}={_quote(value)}]"
+    return css
+
+
+def is_selector(spec):
+    """Whether a spec locates elements (as opposed to e.g. {field: ...} or {inside_title: true})"""
+    if isinstance(spec, list):
+        return bool(spec) and all(is_selector(s) for s in spec)
+    return isinstance(spec, dict) and bool(spec.get("tag") or spec.get("css"))
+
+
+class Selector:
+    """
+    A field selector compiled once from its config spec. A list of specs is an
+    ordered fallback chain: the first alternative that matches anything wins.
+    An alternative with `multiple: true` collects every match and joins their
+    text with `join` (default a newline).
+    """
+
+    def __init__(self, spec):
+        specs = spec if isinstance(spec, list) else [spec]
+        self.css = [spec_to_css(s) for s in specs]
+        self._alternatives = [
+            (sv.compile(css), bool(s.get("multiple")), s.get("join", "\n"))
+            for css, s in zip(self.css, specs)
+        ]
+        # Tag names for scoped parsing; raw CSS or tag-less specs can match anything
+        if all(s.get("tag") and not s.get("css") for s in specs):
+            self.tag_names = {s["tag"] for s in specs}
+        else:
+            self.tag_names = None
+
+    def find(self, root):
+        """First matching element, or None"""
+        for compiled, _, _ in self._alternatives:
+            element = compiled.select_one(root)
+            if element is not None:
+                return element
+        return None
+
+    def find_all(self, root):
+        """Every match of the first alternative that matches anything"""
+        for compiled, _, _ in self._alternatives:
+            elements = compiled.select(root)
+            if elements:
+                return elements
+        return []
+
+    def text(self, root, separator=""):
+        for compiled, multiple, join in self._alternatives:
+            if multiple:
+                elements = compiled.select(root)
+                if elements:
+                    return join.join(e.get_text(separator, strip=True) for e in elements)
+            else:
+                element = compiled.select_one(root)
+                if element is not None:
+                    return element.get_text(separator, strip=True)
+        return ""
+
+
+class SelectorPlan:
+    """
+    Every selector of one config section (`search` or `article`), compiled up front
+    and reused for each page. Specs that don't locate elements are kept in `options`.
+    """
+
+    def __init__(self, section):
+        self.selectors = {}
+        self.options = {}
+        for name, spec in (section or {}).items():
+            if not is_selector(spec):
+                self.options[name] = spec
+                continue
+            try:
+                self.selectors[name] = Selector(spec)
+            except sv.SelectorSyntaxError as e:
+                raise ValueError(f"Invalid selector for '{name}': {e}") from e
+
+    def find(self, name, root):
+        selector = self.selectors.get(name)
+        return selector.find(root) if selector else None
+
+    def find_all(self, name, root):
+        selector = self.selectors.get(name)
+        return selector.find_all(root) if selector else []
+
+    def text(self, name, root, separator=""):
+        """Text of field `name` under root, or "" if it isn't configured or doesn't match"""
+        selector = self.selectors.get(name)
+        return selector.text(root, separator) if selector else ""
+
+    @property
+    def tag_names(self):
+        """Tag names every selector needs, or None if some selector can match any tag"""
+        tags = set()
+        for selector in self.selectors.values():
+            if selector.tag_names is None:
+                return None
+            tags |= selector.tag_names
+        return tags
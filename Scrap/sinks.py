@@ -0,0 +1,142 @@
+import csv
+import os
+
+# Parquet output is optional: it needs pyarrow (pip install pyarrow)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAVE_PYARROW = True
+except ImportError:
+    HAVE_PYARROW = False
+
+# Column order of every article CSV written by the scrapers
+ARTICLE_FIELDS = ["No", "Date", "Title", "Summary", "Content", "Link", "Keywords"]
+
+# Low-cardinality columns stored dictionary-encoded in Parquet (read back as pandas categoricals)
+DICTIONARY_FIELDS = ("Site", "Categories")
+
+
+class CsvSink:
+    """
+    Writes article rows to CSV as they arrive, flushing after every row so output is
+    visible (and safe) while the crawl is still running. With rotate_bytes set, a new
+    file <name>_part002.csv, <name>_part003.csv, ... is started once the current one
+    reaches that size.
+    """
+
+    def __init__(self, path, fieldnames=ARTICLE_FIELDS, rotate_bytes=None, encoding="utf-8-sig"):
+        self.path = path
+        self.fieldnames = fieldnames
+        self.rotate_bytes = rotate_bytes
+        self.encoding = encoding
+        self.paths = []
+        self.rows = 0
+        self._file = None
+        self._writer = None
+        self._open_next()
+
+    def _open_next(self):
+        part = len(self.paths) + 1
+        root, ext = os.path.splitext(self.path)
+        path = self.path if part == 1 else f"{root}_part{part:03d}{ext}"
+        # Excel-friendly UTF-8 BOM, as the scrapers have always written
+        self._file = open(path, mode="w", newline="", encoding=self.encoding)
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, extrasaction="ignore")
+        self._writer.writeheader()
+        self.paths.append(path)
+
+    def write(self, row):
+        if self._file is None:
+            self._open_next()
+        self._writer.writerow(row)
+        self._file.flush()
+        self.rows += 1
+        # The next part is only opened once another row arrives
+        if self.rotate_bytes and self._file.tell() >= self.rotate_bytes:
+            self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def parquet_schema(fieldnames):
+    """Arrow schema of an article table: No as an integer, Site/Categories dictionary-encoded, the rest strings"""
+    fields = []
+    for name in fieldnames:
+        if name == "No":
+            fields.append(pa.field(name, pa.int64()))
+        elif name in DICTIONARY_FIELDS:
+            fields.append(pa.field(name, pa.dictionary(pa.int32(), pa.string())))
+        else:
+            fields.append(pa.field(name, pa.string()))
+    return pa.schema(fields)
+
+
+class ParquetSink:
+    """
+    CsvSink counterpart writing a zstd-compressed Parquet file. Rows are buffered and
+    written one row group at a time, so a reader can later load single columns (e.g.
+    Link or Categories) without touching the Content column. Nothing is visible in
+    the file until close(), which writes the footer.
+    """
+
+    def __init__(self, path, fieldnames=ARTICLE_FIELDS, row_group_rows=2000, compression="zstd"):
+        if not HAVE_PYARROW:
+            raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow)")
+        self.path = path
+        self.paths = [path]
+        self.fieldnames = list(fieldnames)
+        self.row_group_rows = row_group_rows
+        self.rows = 0
+        self.schema = parquet_schema(self.fieldnames)
+        self._pending = []
+        self._writer = pq.ParquetWriter(
+            path, self.schema, compression=compression,
+            use_dictionary=[name for name in self.fieldnames if name in DICTIONARY_FIELDS]
+        )
+
+    def write(self, row):
+        self._pending.append(row)
+        self.rows += 1
+        if len(self._pending) >= self.row_group_rows:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        columns = {}
+        for name in self.fieldnames:
+            values = [row.get(name) for row in self._pending]
+            if name == "No":
+                columns[name] = [int(v) if v not in (None, "") else None for v in values]
+            else:
+                columns[name] = [None if v is None else str(v) for v in values]
+        self._writer.write_table(pa.Table.from_pydict(columns, schema=self.schema))
+        self._pending = []
+
+    def close(self):
+        if self._writer is not None:
+            self.flush()
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def open_sink(path, fieldnames=ARTICLE_FIELDS, rotate_bytes=None):
+    """CsvSink, or ParquetSink for a .parquet path (which doesn't rotate)"""
+    if path.endswith(".parquet"):
+        return ParquetSink(path, fieldnames=fieldnames)
+    return CsvSink(path, fieldnames=fieldnames, rotate_bytes=rotate_bytes)
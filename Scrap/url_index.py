@@ -0,0 +1,74 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+
+from http_cache import normalize_url
+
+
+def url_key(link):
+    """64-bit key of an article URL: the first 8 bytes of a hash of its canonical form"""
+    digest = hashlib.blake2b(normalize_url(link).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class UrlIndex:
+    """
+    Set of article URLs seen so far, for deduplicating datasets too large to hold in
+    memory. Each canonical URL is kept as an 8-byte hash in the integer primary key
+    of an SQLite table, so the index costs a few dozen bytes per article on disk and
+    a bounded page cache in memory. At 64 bits, the chance that two of a million
+    distinct URLs share a key (and one is wrongly dropped) is about 3 in 10^8.
+
+    Without a path, the index lives in a temporary file removed on close(); with one,
+    it persists, and a later run deduplicates against every URL seen before.
+    """
+
+    def __init__(self, path=None, cache_mb=64):
+        self.temporary = path is None
+        if self.temporary:
+            fd, path = tempfile.mkstemp(prefix="url_index_", suffix=".sqlite")
+            os.close(fd)
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        # Only this process writes it, and a temporary index isn't worth a journal
+        self._conn.execute("PRAGMA journal_mode=OFF" if self.temporary else "PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(f"PRAGMA cache_size=-{int(cache_mb) * 1024}")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS seen (key INTEGER PRIMARY KEY)")
+        self._conn.commit()
+
+    def add_new(self, links):
+        """
+        Record a batch of links and return, for each, whether it is new: not seen in an
+        earlier batch, nor earlier in this one
+        """
+        keys = [url_key(link) for link in links]
+        existing = set()
+        unique = list(set(keys))
+        for start in range(0, len(unique), 500):
+            chunk = unique[start:start + 500]
+            existing.update(key for (key,) in self._conn.execute(
+                f"SELECT key FROM seen WHERE key IN ({', '.join('?' * len(chunk))})", chunk))
+        new = []
+        for key in keys:
+            new.append(key not in existing)
+            existing.add(key)
+        with self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO seen (key) VALUES (?)",
+                                   [(key,) for key, is_new in zip(keys, new) if is_new])
+        return new
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+        if self.temporary:
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,23 +1,141 @@
-import pandas as pd
+"""
+Write the merged, deduplicated dataset to one CSV or Parquet file, either from the
+article store or straight from crawl files.
 
-# Read each deduplicated CSV file into a DataFrame
-df1 = pd.read_csv(r"D:\Data\vietnews\src\classified_data\categorized_articles_cleaned_2.csv")
-df2 = pd.read_csv(r"D:\Data\vietnews\src\classified_data\categorized_articles_cleaned.csv")
-#df3 = pd.read_csv(r"D:\Data\vietnews\src\cleaned_dataset\viresa_api_20250408_020904_deduped.csv")
-#df4 = pd.read_csv(r"D:\Data\vietnews\src\cleaned_dataset\vnexpress_news_20250327_170102.csv")
+    python merge.py --output final_data.csv
+    python merge.py --output final_data.parquet
+    python merge.py --site tinhte --categorized-only
 
-# Concatenate all DataFrames into one
-merged_df = pd.concat([df1, df2], ignore_index=True)
+Every URL is stored once, so merging the store needs no extra deduplication step.
+Rows are streamed from the store in batches rather than loaded all at once.
 
-# (Optional) If you'd like to remove any duplicates across the combined data
-# based on a column like 'link', uncomment the line below:
-# merged_df.drop_duplicates(subset='link', keep='first', inplace=True)
+Given input files or globs, those are merged instead, without the store:
 
-#drop collumns "No"
-merged_df.drop(columns=["No"], inplace=True, errors='ignore')
-# Save the merged dataset to a new CSV file
-merged_df.to_csv('final_data.csv', index=False, encoding='utf-8-sig')
+    python merge.py "D:\\Data\\vietnews\\output\\*.csv" monthly/*.parquet --output final_data.parquet
 
-print("Merged data saved as merged_data.csv")
-print("Merged data shape:", merged_df.shape)
-print("Merged data columns:", merged_df.columns.tolist())
\ No newline at end of file
+The inputs are read a chunk at a time and deduplicated across all of them by
+canonical Link, keeping the first occurrence (inputs are taken in sorted order).
+Seen links are kept as 8-byte hashes in an on-disk index, so memory stays bounded
+however many files are merged. Pass --index seen.sqlite to keep that index: a later
+merge with the same index then writes only articles not merged before.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "Scrap"))
+
+from article_store import DEFAULT_STORE_PATH, ArticleStore
+from frames import iter_rows, read_columns, site_from_filename
+from sinks import open_sink
+from url_index import UrlIndex
+
+FIELDS = ["Date", "Title", "Summary", "Content", "Link", "Keywords", "Site", "Categories"]
+
+
+def export_store(args):
+    where, params = [], []
+    if args.site:
+        where.append("site = ?")
+        params.append(args.site)
+    if args.categorized_only:
+        where.append("category IS NOT NULL")
+
+    store = ArticleStore(args.store)
+    rows = 0
+    with open_sink(args.output, fieldnames=FIELDS) as sink:
+        for article in store.iter_articles(" AND ".join(where), params):
+            sink.write({
+                "Date": article["date"],
+                "Title": article["title"],
+                "Summary": article["summary"],
+                "Content": article["content"],
+                "Link": article["link"],
+                "Keywords": "; ".join(json.loads(article["keywords"] or "[]")),
+                "Site": article["site"],
+                # Cleaned category where post_processing.py has run, else the raw model output
+                "Categories": article["category"] or article["categories"] or "",
+            })
+            rows += 1
+    store.close()
+    return rows, FIELDS
+
+
+def merge_files(files, args):
+    # Union of the input columns, in first-seen order; every row gets a Site
+    fieldnames = []
+    for path in files:
+        fieldnames += [name for name in read_columns(path) if name not in fieldnames]
+    if "Site" not in fieldnames:
+        fieldnames.append("Site")
+
+    rows = 0
+    with UrlIndex(args.index) as index, open_sink(args.output, fieldnames=fieldnames) as sink:
+        for path in files:
+            site = args.site or site_from_filename(path)
+            read = kept = no_link = 0
+            for chunk in chunks(iter_rows(path), args.chunk_size):
+                kept_chunk, skipped = merge_chunk(chunk, index, sink, site, rows)
+                rows += kept_chunk
+                kept += kept_chunk
+                no_link += skipped
+                read += len(chunk)
+            print(f"{path}: {read} rows, {kept} kept, {read - kept - no_link} duplicates, {no_link} without a Link")
+        print(f"Index: {len(index)} unique links")
+    return rows, fieldnames
+
+
+def chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def merge_chunk(chunk, index, sink, site, written):
+    """Write the rows of a chunk whose Link is new; returns (rows written, rows without a Link)"""
+    linked = [row for row in chunk if (row.get("Link") or "").strip()]
+    kept = 0
+    for row, is_new in zip(linked, index.add_new([row["Link"] for row in linked])):
+        if not is_new:
+            continue
+        kept += 1
+        row = dict(row)
+        row["Site"] = row.get("Site") or site
+        if "No" in row:
+            # Per-file numbering would repeat across inputs
+            row["No"] = written + kept
+        sink.write(row)
+    return kept, len(chunk) - len(linked)
+
+
+parser = argparse.ArgumentParser(description='Write the merged dataset from the article store or from crawl files')
+parser.add_argument('inputs', nargs='*', help='CSV or Parquet files, or glob patterns, to merge instead of the store')
+parser.add_argument('--store', default=DEFAULT_STORE_PATH, help='SQLite article store')
+parser.add_argument('--output', default='final_data.csv', help='File to write (.csv, or .parquet with pyarrow installed)')
+parser.add_argument('--site', help='Only articles of this site (with inputs: Site of rows that have none)')
+parser.add_argument('--categorized-only', action='store_true',
+                    help='Only articles with a valid category (after post_processing.py)')
+parser.add_argument('--index', help='Keep the seen-link index of an inputs merge in this file (default: temporary)')
+parser.add_argument('--chunk-size', type=int, default=5000, help='Rows deduplicated per index lookup')
+args = parser.parse_args()
+
+if args.inputs:
+    files = sorted({f for pattern in args.inputs for f in (glob.glob(pattern) or [pattern])})
+    if os.path.abspath(args.output) in map(os.path.abspath, files):
+        parser.error('--output is one of the inputs')
+    if args.categorized_only:
+        parser.error('--categorized-only applies to the store; run post_processing.py --input on the merged file')
+    rows, fieldnames = merge_files(files, args)
+else:
+    rows, fieldnames = export_store(args)
+
+print(f"Merged data saved as {args.output}")
+print("Merged data shape:", (rows, len(fieldnames)))
+print("Merged data columns:", fieldnames)
@@ -1,13 +1,11 @@
-import pandas as pd
+import argparse
+import os
+import sys
 
-# Read the original CSV file into a DataFrame
-original_df = pd.read_csv(r"D:\Data\vietnews\src\classified_data\categorized_articles_20250408_162314.csv", encoding='utf-8-sig')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "Scrap"))
 
-# Create a new dataframe by making a copy of the original data
-new_df = original_df.copy()
-
-# Remove rows where the Categories column is NaN or exactly the string "None"
-new_df = new_df[new_df['Categories'].notna() & (new_df['Categories'] != 'None')]
+from article_store import DEFAULT_STORE_PATH, ArticleStore
+from frames import read_frame, write_frame
 
 # Define a mapping dictionary to replace numeric categories with full text descriptions
 mapping = {
@@ -24,23 +22,73 @@ mapping = {
 # Define the valid categories (both numeric and text formats)
 valid_categories = list(mapping.keys()) + list(mapping.values())
 
-# Filter to keep only rows with valid categories
-print(f"Original number of rows: {len(new_df)}")
-new_df = new_df[new_df['Categories'].isin(valid_categories)]
-print(f"Rows after filtering for valid categories: {len(new_df)}")
 
-# Replace numeric values in the Categories column using the mapping dictionary
-new_df['Categories'] = new_df['Categories'].replace(mapping)
+def clean_category(value):
+    """Full-text category for a model answer, or None if it isn't one valid category"""
+    if value is None or value == 'None' or value not in valid_categories:
+        return None
+    return mapping.get(value, value)
+
+
+def clean_store(store_path):
+    """Clean the categories of articles categorized (or re-categorized) since the last run"""
+    store = ArticleStore(store_path)
+    pending = store.pending_cleanup()
+    results = [(a["url"], clean_category(a["categories"]), a["categories"]) for a in pending]
+    store.set_category(results)
+    valid = [category for _, category, _ in results if category is not None]
+    print(f"Cleaned {len(results)} newly categorized articles: {len(valid)} valid, "
+          f"{len(results) - len(valid)} without a valid category")
+    print("\nCategory distribution of this run:")
+    for category in sorted(set(valid)):
+        print(f"{category}: {valid.count(category)}")
+    store.close()
+
+
+def clean_file(input_path, output_path):
+    # Read the original CSV or Parquet file into a DataFrame
+    original_df = read_frame(input_path)
+
+    # Create a new dataframe by making a copy of the original data
+    new_df = original_df.copy()
+
+    # Parquet loads Categories as a categorical, which can't take the mapped names below
+    new_df['Categories'] = new_df['Categories'].astype(object)
+
+    # Remove rows where the Categories column is NaN or exactly the string "None"
+    new_df = new_df[new_df['Categories'].notna() & (new_df['Categories'] != 'None')]
+
+    # Filter to keep only rows with valid categories
+    print(f"Original number of rows: {len(new_df)}")
+    new_df = new_df[new_df['Categories'].isin(valid_categories)]
+    print(f"Rows after filtering for valid categories: {len(new_df)}")
+
+    # Replace numeric values in the Categories column using the mapping dictionary
+    new_df['Categories'] = new_df['Categories'].replace(mapping)
+
+    # Display the first few rows of the modified dataframe
+    print("\nFirst few rows of cleaned data:")
+    print(new_df.head())
+
+    # Display the count of each category
+    print("\nCategory distribution:")
+    print(new_df['Categories'].value_counts())
+
+    # Export the cleaned data to a new file of the same format
+    write_frame(new_df, output_path)
 
-# Display the first few rows of the modified dataframe
-print("\nFirst few rows of cleaned data:")
-print(new_df.head())
+    print(f"\nCleaned data saved to: {output_path}")
 
-# Display the count of each category
-print("\nCategory distribution:")
-print(new_df['Categories'].value_counts())
 
-# Export the cleaned data to a new CSV file
-new_df.to_csv(r"D:\Data\vietnews\src\classified_data\categorized_articles_cleaned.csv", index=False, encoding='utf-8-sig')
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Map model categories to their full names and drop invalid ones')
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH, help='SQLite article store (the default input)')
+    parser.add_argument('--input', help='Clean this categorized CSV or Parquet file instead of the store')
+    parser.add_argument('--output', help='Output of --input (default: <input>_cleaned with the same extension)')
+    args = parser.parse_args()
 
-print(f"\nCleaned data saved to: categorized_articles_tinhte_20250530_191010_cleaned.csv")
+    if args.input:
+        root, ext = os.path.splitext(args.input)
+        clean_file(args.input, args.output or f"{root}_cleaned{ext}")
+    else:
+        clean_store(args.store)
@@ -1,25 +1,40 @@
-import pandas as pd
+"""
+Load crawl CSVs (or Parquet files) into the article store. Articles are keyed by canonical URL, so
+duplicates within a file, across files and against earlier crawls are merged on
+insert instead of being removed afterwards.
+
+    python remove_dup.py D:\\Data\\vietnews\\output\\dantri_20250530_184654.csv
+    python remove_dup.py "D:\\Data\\vietnews\\output\\*.csv"
+
+The scrapers write to the store themselves; this is for CSVs from older runs.
+"""
+import argparse
+import glob
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "Scrap"))
 
-# Load the CSV file into a pandas DataFrame.
-df = pd.read_csv(r"D:\Data\vietnews\output\dantri_20250530_184654.csv", encoding='utf-8-sig')
-print("Original dataframe shape:", df.shape)
+from article_store import DEFAULT_STORE_PATH, ArticleStore, StoreSink
+from frames import iter_rows, site_from_filename
 
-# Remove duplicate rows based on the 'link' column.
-df_deduped = df.drop_duplicates(subset='Link', keep='first')
-print("Dataframe shape after removing duplicates:", df_deduped.shape)
 
-# Define the output folder name
-output_dir = "cleaned_dataset"
+parser = argparse.ArgumentParser(description='Upsert crawl CSVs into the article store (deduplicated by URL)')
+parser.add_argument('inputs', nargs='+', help='CSV or Parquet files, or glob patterns')
+parser.add_argument('--store', default=DEFAULT_STORE_PATH, help='SQLite article store')
+parser.add_argument('--site', help='Site of every row (default: from each file name)')
+args = parser.parse_args()
 
-# Create the folder if it doesn't exist
-if not os.path.exists(output_dir):
-    os.makedirs(output_dir)
-    print(f"Folder '{output_dir}' created.")
+files = sorted({f for pattern in args.inputs for f in (glob.glob(pattern) or [pattern])})
+store = ArticleStore(args.store)
+before = store.count()
 
-# Construct the full path for the output CSV file
-output_file_path = os.path.join(output_dir, "dantri_20250530_184654_deduped.csv")
+for path in files:
+    # Read the file a batch of rows at a time; the store is written in batched transactions
+    with StoreSink(store, site=args.site or site_from_filename(path), batch_size=500) as sink:
+        for row in iter_rows(path):
+            sink.write(row)
+    print(f"{path}: {sink.rows} rows, {sink.summary()}")
 
-# Save the deduplicated DataFrame to the CSV file in the specified folder
-df_deduped.to_csv(output_file_path, index=False, encoding='utf-8-sig')
-print(f"Deduplicated CSV saved to: {output_file_path}")
+print(f"Store now holds {store.count()} unique articles ({store.count() - before} added)")
+store.close()
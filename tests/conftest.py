@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The Scrap modules import each other as top-level modules, as when run from Scrap/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Scrap"))
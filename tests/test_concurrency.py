@@ -0,0 +1,124 @@
+import threading
+import time
+
+from concurrency import AdaptiveLimit, ordered_map, percentile, prefetch_pages
+
+
+def test_percentile_is_nearest_rank():
+    assert percentile([5, 1, 3, 2, 4], 50) == 3
+    assert percentile(range(1, 101), 95) == 95
+    assert percentile([7], 99) == 7
+
+
+def run_saturated(limit, responses, latency=0.1):
+    """Steady traffic: each answered request is replaced at once, so the limit stays full"""
+    tickets = [limit.acquire() for _ in range(int(limit.limit))]
+    for _ in range(responses):
+        limit.release(tickets.pop(0), latency)
+        while len(tickets) < int(limit.limit):
+            tickets.append(limit.acquire())
+    for ticket in tickets:
+        limit.release(ticket)
+
+
+def test_limit_grows_by_about_one_per_saturated_round():
+    limit = AdaptiveLimit(initial=2, maximum=10, window=1000)
+    # +1/limit per response: 2 + 3 + 4 responses take it from 2 to about 5
+    run_saturated(limit, 9)
+    assert 4 <= int(limit.limit) <= 5
+    assert limit.increases >= 2
+
+
+def test_limit_does_not_grow_while_underused():
+    limit = AdaptiveLimit(initial=4, maximum=10)
+    for _ in range(20):
+        limit.release(limit.acquire(), 0.1)
+    assert int(limit.limit) == 4
+
+
+def test_congestion_halves_the_limit_once_per_burst():
+    limit = AdaptiveLimit(initial=8, maximum=16)
+    tickets = [limit.acquire() for _ in range(8)]
+    assert limit.release(tickets[0], congested=True)
+    assert int(limit.limit) == 4
+    # Sent before the decrease: their failures describe the old limit
+    for ticket in tickets[1:]:
+        assert not limit.release(ticket, congested=True)
+    assert int(limit.limit) == 4
+    assert limit.release(limit.acquire(), congested=True)
+    assert int(limit.limit) == 2
+
+
+def test_rising_latency_counts_as_congestion():
+    limit = AdaptiveLimit(initial=8, maximum=16, window=5, latency_factor=2.0)
+    for _ in range(5):
+        limit.release(limit.acquire(), 0.1)
+    for _ in range(5):
+        limit.release(limit.acquire(), 0.5)
+    assert int(limit.limit) == 4
+
+
+def test_limit_stays_within_bounds_and_fixed_when_not_adaptive():
+    limit = AdaptiveLimit(initial=2, minimum=2, maximum=3, window=1000)
+    limit.release(limit.acquire(), congested=True)
+    assert int(limit.limit) == 2
+    run_saturated(limit, 20)
+    assert int(limit.limit) == 3
+    fixed = AdaptiveLimit(initial=4, adaptive=False)
+    fixed.release(fixed.acquire(), congested=True)
+    assert int(fixed.limit) == 4
+
+
+def test_acquire_blocks_at_the_limit():
+    limit = AdaptiveLimit(initial=1, maximum=1)
+    ticket = limit.acquire()
+    got = threading.Event()
+    threading.Thread(target=lambda: (limit.acquire(), got.set()), daemon=True).start()
+    assert not got.wait(0.1)
+    limit.release(ticket, 0.1)
+    assert got.wait(1)
+
+
+def test_ordered_map_keeps_input_order():
+    def slow_first(n):
+        time.sleep(0.05 if n == 0 else 0)
+        return n * n
+    assert list(ordered_map(slow_first, range(10), max_workers=4)) == [n * n for n in range(10)]
+
+
+def test_ordered_map_stops_submitting_when_closed():
+    started = []
+    lock = threading.Lock()
+
+    def record(n):
+        with lock:
+            started.append(n)
+        time.sleep(0.02)
+        return n
+
+    results = ordered_map(record, range(100), max_workers=2, window=4)
+    assert next(results) == 0
+    results.close()
+    time.sleep(0.1)
+    assert len(started) <= 5
+
+
+def test_prefetch_pages_skips_pages_past_the_stop():
+    fetched = []
+    lock = threading.Lock()
+
+    def fetch(page):
+        time.sleep(0.02 * page)
+        with lock:
+            fetched.append(page)
+        return [page] if page < 3 else []
+
+    pages = prefetch_pages(fetch, 20, window=4)
+    for page, results in pages:
+        if not results:
+            break
+    pages.close()
+    time.sleep(0.2)
+    # Pages 1-3 plus at most the window already running when page 3 came back
+    assert max(fetched) <= 3 + 3
+    assert len(fetched) < 20
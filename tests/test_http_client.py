@@ -0,0 +1,13 @@
+import socket
+
+from http_client import HttpClient
+
+
+def test_clients_share_one_dns_cache():
+    first = HttpClient()
+    patched = socket.getaddrinfo
+    second = HttpClient()
+    assert second.dns_cache is first.dns_cache
+    # A second client doesn't wrap the already-patched resolver again
+    assert socket.getaddrinfo == patched
+    assert first.dns_cache._getaddrinfo is not patched
@@ -0,0 +1,102 @@
+import json
+import sqlite3
+import threading
+import time
+
+from crawl_state import CrawlState
+from flexible_scraper import FlexibleScraper
+from http_client import build_response
+from json_api import JsonListing
+
+SEARCH = {
+    "items": "data",
+    "last_page": ["last_page", "meta.last_page"],
+    "title": {"field": "title"},
+    "link": {"template": "{base_url}/{slug}"},
+}
+
+CONFIG = {
+    "site_name": "api",
+    "base_url": "http://api.test",
+    "api_url": "http://api.test/api/news",
+    "search_url_pattern": "{api_url}?page={page}&slug={keyword}",
+    "scraping_method": "json_api",
+    "selectors": {"search": SEARCH, "article": {}},
+    "concurrency": {"search_prefetch": 5},
+}
+
+
+class FakeApi:
+    """Client answering every listing page with 2 items and the given last_page"""
+
+    def __init__(self, last_page=3):
+        self.last_page = last_page
+        self.pages = []
+        self._lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        page = int(url.split("page=")[1].split("&")[0])
+        with self._lock:
+            self.pages.append(page)
+        # Slow enough that prefetched pages are all in flight before the first answer
+        time.sleep(0.05)
+        body = {"data": [{"title": f"t{page}-{i}", "slug": f"a{page}-{i}"} for i in range(2)],
+                "meta": {"last_page": self.last_page}}
+        return build_response(None, 200, {"Content-Type": "application/json"}, json.dumps(body).encode(), url=url)
+
+
+def make_scraper(api, state=None):
+    scraper = FlexibleScraper(json.loads(json.dumps(CONFIG)), state=state)
+    scraper.client = api
+    return scraper
+
+
+def test_listing_reads_last_page_from_any_path():
+    listing = JsonListing(SEARCH)
+    assert listing.last_page({"last_page": "4"}) == 4
+    assert listing.last_page({"meta": {"last_page": 2}}) == 2
+    assert listing.last_page({"data": []}) is None
+    assert listing.is_last({"meta": {"last_page": 2}}, 2)
+    assert not listing.is_last({"meta": {"last_page": 2}}, 1)
+
+
+def test_listing_without_next_link_is_last():
+    listing = JsonListing({"items": "data", "next": "links.next"})
+    assert listing.is_last({"links": {"next": None}}, 1)
+    assert not listing.is_last({"links": {"next": "http://api.test/?page=2"}}, 1)
+
+
+def test_prefetch_stops_at_the_reported_last_page():
+    api = FakeApi(last_page=3)
+    results = make_scraper(api).get_all_search_results("tin", max_pages=10)
+    assert sorted(api.pages) == [1, 2, 3]
+    assert len(results) == 6
+
+
+def test_resumed_run_knows_the_last_page(tmp_path):
+    state = CrawlState.create(str(tmp_path), CONFIG, ["tin"], run_id="api_run")
+    # The interrupted run got as far as page 1
+    make_scraper(FakeApi(last_page=3), state).get_search_results_page("tin", page=1)
+    state.close()
+
+    resumed = CrawlState.open(str(tmp_path), "api_run")
+    api = FakeApi(last_page=3)
+    results = make_scraper(api, resumed).get_all_search_results("tin", max_pages=10)
+    resumed.close()
+    assert sorted(api.pages) == [2, 3]
+    assert len(results) == 6
+
+
+def test_checkpoint_written_before_last_page_was_recorded(tmp_path):
+    path = tmp_path / "old.sqlite"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE search_pages (keyword TEXT, page INTEGER, results TEXT, PRIMARY KEY (keyword, page))")
+    conn.execute("INSERT INTO search_pages VALUES ('tin', 1, '[]')")
+    conn.commit()
+    conn.close()
+    state = CrawlState(str(path))
+    assert state.search_page("tin", 1) == []
+    assert state.last_page("tin") is None
+    state.record_search_page("tin", 2, [], last_page=2)
+    assert state.last_page("tin") == 2
+    state.close()
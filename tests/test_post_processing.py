@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("pyarrow")
+
+from post_processing import clean_file, mapping  # noqa: E402  (also puts Scrap/ on the path)
+from frames import read_frame, write_frame  # noqa: E402
+
+
+def test_clean_file_parquet_round_trip(tmp_path):
+    source = tmp_path / "cat.parquet"
+    output = tmp_path / "cat_cleaned.parquet"
+    write_frame(pd.DataFrame({
+        "Link": ["https://a.vn/1", "https://a.vn/2", "https://a.vn/3", "https://a.vn/4"],
+        "Site": ["dantri", "dantri", "gamek", "gamek"],
+        "Categories": ["1", "None", mapping[4], "not a category"],
+    }), str(source))
+
+    clean_file(str(source), str(output))
+
+    cleaned = read_frame(str(output))
+    assert list(cleaned["Link"]) == ["https://a.vn/1", "https://a.vn/3"]
+    assert list(cleaned["Categories"].astype(str)) == [mapping[1], mapping[4]]
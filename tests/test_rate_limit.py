@@ -0,0 +1,38 @@
+import threading
+import time
+
+from rate_limit import DomainRateLimiter, TokenBucket
+
+
+def test_bucket_spaces_requests_at_its_rate():
+    bucket = TokenBucket(rate=20, burst=1)
+    assert bucket.reserve() == 0
+    assert abs(bucket.reserve() - 0.05) < 0.01
+    assert abs(bucket.reserve() - 0.10) < 0.01
+
+
+def test_burst_is_available_at_once():
+    bucket = TokenBucket(rate=1, burst=3)
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+    assert bucket.reserve() > 0
+
+
+def test_stopped_wait_returns_its_token():
+    bucket = TokenBucket(rate=2, burst=1)
+    bucket.reserve()
+    stop = threading.Event()
+    threading.Timer(0.05, stop.set).start()
+    start = time.monotonic()
+    assert bucket.acquire(stop) is False
+    assert time.monotonic() - start < 0.3
+    # Only the first token is still owed, not the skipped one
+    assert bucket.reserve() <= 0.5
+    assert bucket.acquired == 2
+
+
+def test_unlimited_host_only_checks_stop():
+    limiter = DomainRateLimiter(default_rate=None)
+    stop = threading.Event()
+    assert limiter.acquire("http://example.test/", stop) is True
+    stop.set()
+    assert limiter.acquire("http://example.test/", stop) is False
@@ -0,0 +1,132 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from http_client import HttpClient, RequestSkipped, build_response
+from concurrency import _task
+from retry import CircuitBreaker, CircuitOpenError, RetryPolicy
+
+URL = "http://example.test/page"
+
+
+class FakeSession:
+    """Session returning canned responses (or raising canned exceptions) and counting calls"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return build_response(None, outcome, {}, b"", url=url)
+
+
+def make_client(session, rate=None, failures=1):
+    client = HttpClient(default_rate=rate)
+    client.session_for = lambda url: session
+    client.default_retry = RetryPolicy(retries=0)
+    client.breakers.defaults = {"failures": failures, "reset_after": 0.05}
+    return client
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failures=3, reset_after=60)
+    assert not breaker.record_failure()
+    assert not breaker.record_failure()
+    assert breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request("example.test")
+    assert breaker.rejected == 1
+
+
+def test_breaker_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failures=2, reset_after=60)
+    breaker.record_failure()
+    breaker.record_success()
+    assert not breaker.record_failure()
+    assert not breaker.is_open
+
+
+def test_half_open_trial_closes_or_reopens():
+    breaker = CircuitBreaker(failures=1, reset_after=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.before_request() is True
+    # Only one trial at a time
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+    breaker.record_failure()
+    assert breaker.is_open
+    time.sleep(0.06)
+    assert breaker.before_request() is True
+    breaker.record_success()
+    assert not breaker.is_open
+    assert breaker.before_request() is False
+
+
+def test_cancelled_trial_lets_the_next_request_try():
+    breaker = CircuitBreaker(failures=1, reset_after=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.before_request() is True
+    breaker.cancel_trial()
+    assert breaker.is_open
+    assert breaker.before_request() is True
+
+
+def test_non_retryable_error_ends_the_trial():
+    session = FakeSession(requests.exceptions.ConnectionError(), requests.exceptions.InvalidURL(), 200)
+    client = make_client(session)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.get(URL)
+    time.sleep(0.06)
+    with pytest.raises(requests.exceptions.InvalidURL):
+        client.get(URL)
+    time.sleep(0.06)
+    assert client.get(URL).status_code == 200
+    assert not client.breakers.breaker(URL).is_open
+
+
+def test_skipped_trial_does_not_leave_the_breaker_stuck():
+    # One request per second: the trial has to wait for a token, and is skipped meanwhile
+    session = FakeSession(requests.exceptions.ConnectionError(), 200)
+    client = make_client(session, rate=1.0)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.get(URL)
+    time.sleep(0.06)
+
+    stop = threading.Event()
+    threading.Timer(0.1, stop.set).start()
+    _task.stop = stop
+    try:
+        with pytest.raises(RequestSkipped):
+            client.get(URL)
+    finally:
+        _task.stop = None
+    assert session.calls == 1
+
+    # The skipped request was never sent, so the next one gets the trial
+    assert client.get(URL).status_code == 200
+    assert not client.breakers.breaker(URL).is_open
+
+
+def test_retry_after_is_honoured_up_to_the_cap():
+    policy = RetryPolicy(backoff=0.5, max_retry_after=10)
+    assert policy.delay(0, build_response(None, 429, {"Retry-After": "3"}, b"")) == 3
+    assert policy.delay(0, build_response(None, 503, {"Retry-After": "600"}, b"")) == 10
+    assert 0 <= policy.delay(2, build_response(None, 500, {}, b"")) <= 2.0
+    assert policy.should_retry(build_response(None, 502, {}, b""))
+    assert not policy.should_retry(build_response(None, 404, {}, b""))
+
+
+def test_retryable_status_is_retried_then_returned():
+    session = FakeSession(503, 503, 200)
+    client = make_client(session, failures=10)
+    client.default_retry = RetryPolicy(retries=3, backoff=0.01)
+    assert client.get(URL).status_code == 200
+    assert session.calls == 3
@@ -0,0 +1,62 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from selector_engine import Selector, SelectorPlan, spec_to_css
+
+HTML = """
+<div class="box rightdetail_content"><p>One</p><p>Two</p></div>
+<div class="f1 w445">Exact</div>
+<h1 data-field="title">Title</h1>
+<time datetime="2025-05-01">1 May</time>
+"""
+
+
+@pytest.fixture
+def soup():
+    return BeautifulSoup(HTML, "html.parser")
+
+
+def test_spec_to_css():
+    assert spec_to_css({"tag": "h1", "data_field": "title"}) == 'h1[data-field="title"]'
+    assert spec_to_css({"tag": "div", "class": "rightdetail_content"}) == 'div[class~="rightdetail_content"]'
+    assert spec_to_css({"tag": "div", "class": "f1 w445"}) == 'div[class="f1 w445"]'
+    assert spec_to_css({"tag": "time", "datetime": True}) == "time[datetime]"
+    assert spec_to_css({"css": "a.more > span"}) == "a.more > span"
+    assert spec_to_css({"class": "x"}) == '*[class~="x"]'
+
+
+def test_class_matching_follows_find(soup):
+    assert Selector({"tag": "div", "class": "rightdetail_content"}).find(soup) is not None
+    assert Selector({"tag": "div", "class": "f1 w445"}).text(soup) == "Exact"
+    assert Selector({"tag": "div", "class": "w445 f1"}).find(soup) is None
+
+
+def test_fallback_chain_uses_the_first_match(soup):
+    selector = Selector([{"tag": "h2", "class": "missing"}, {"tag": "h1", "data_field": "title"}, {"tag": "time"}])
+    assert selector.text(soup) == "Title"
+    assert Selector([{"tag": "h2"}, {"tag": "h3"}]).text(soup) == ""
+
+
+def test_multiple_joins_every_match(soup):
+    selector = Selector({"tag": "p", "multiple": True, "join": " | "})
+    assert selector.text(soup) == "One | Two"
+    assert len(Selector({"tag": "p"}).find_all(soup)) == 2
+
+
+def test_plan_keeps_non_selectors_as_options(soup):
+    plan = SelectorPlan({
+        "title": {"tag": "h1"},
+        "date": [{"tag": "span", "class": "date"}, {"tag": "time"}],
+        "summary": {"field": "description"},
+    })
+    assert plan.text("title", soup) == "Title"
+    assert plan.text("date", soup) == "1 May"
+    assert plan.text("summary", soup) == ""
+    assert plan.options == {"summary": {"field": "description"}}
+    assert plan.tag_names == {"h1", "span", "time"}
+    assert SelectorPlan({"x": {"css": "div > p"}}).tag_names is None
+
+
+def test_invalid_css_names_the_field():
+    with pytest.raises(ValueError, match="content"):
+        SelectorPlan({"content": {"css": "div[["}})
@@ -0,0 +1,28 @@
+import os
+
+from url_index import UrlIndex, url_key
+
+
+def test_url_key_uses_the_canonical_url():
+    assert url_key("https://Example.vn:443/a?b=2&a=1#top") == url_key("https://example.vn/a?a=1&b=2")
+    assert url_key("https://example.vn/a") != url_key("https://example.vn/b")
+
+
+def test_add_new_dedupes_within_and_across_batches():
+    with UrlIndex() as index:
+        assert index.add_new(["https://a.vn/1", "https://a.vn/2", "https://A.vn/1"]) == [True, True, False]
+        assert index.add_new(["https://a.vn/2", "https://a.vn/3"]) == [False, True]
+        assert len(index) == 3
+
+
+def test_temporary_index_is_removed_and_named_one_persists(tmp_path):
+    index = UrlIndex()
+    path = index.path
+    index.close()
+    assert not os.path.exists(path)
+
+    named = str(tmp_path / "seen.sqlite")
+    with UrlIndex(named) as index:
+        index.add_new(["https://a.vn/1"])
+    with UrlIndex(named) as index:
+        assert index.add_new(["https://a.vn/1", "https://a.vn/2"]) == [False, True]